@@ -471,7 +471,11 @@ perform_installation() {
             echo "  Installing required packages..."
             # Note: network-manager is pre-installed in Pi OS Bookworm/Trixie
             # But we include it to be safe for older versions
-            apt-get install -y curl wget jq network-manager python3 python3-pip >> "$LOG_FILE" 2>&1
+            apt-get install -y curl wget jq network-manager python3 python3-pip python3-dbus >> "$LOG_FILE" 2>&1
+            # Optional: faster JSON for the config server (stdlib json is the fallback;
+            # not packaged on older releases, so don't fail the install over it)
+            apt-get install -y python3-orjson >> "$LOG_FILE" 2>&1 || \
+                log "python3-orjson not available, config server will use stdlib json"
 
             # NetworkManager is default in Pi OS Bookworm (2023) and Trixie (2025)
             # But we'll ensure it's enabled
@@ -24,13 +24,19 @@ Platform Detection URLs (all get 302 redirect):
 - Firefox: /canonical.html, /success.txt
 """
 
+import collections
+import errno
+import http.client
 import http.server
-import socketserver
-import urllib.request
-import urllib.error
+import logging
+import logging.handlers
+import queue
+import re
+import select
 import sys
 import signal
 import socket
+import threading
 import time
 
 # Configuration
@@ -40,7 +46,7 @@ WIFI_CONNECT_HOST = 'localhost'
 REDIRECT_TARGET = '/'  # Redirect to root (WiFi Connect UI)
 
 # Captive portal detection paths - all trigger redirect to portal UI
-PORTAL_DETECTION_PATHS = {
+PORTAL_DETECTION_PATHS = frozenset({
     # Apple devices (iOS, macOS)
     '/hotspot-detect.html',
     '/library/test/success.html',
@@ -72,30 +78,196 @@ PORTAL_DETECTION_PATHS = {
     # Generic fallbacks
     '/chat',  # Some captive portal detectors try this
     '/portal',
-}
+})
+
+# Match detection paths straight against the raw request path, ignoring case
+# and any query string, without allocating a lowered copy per request
+PORTAL_DETECTION_RE = re.compile(
+    r'(?:' + '|'.join(re.escape(path) for path in sorted(PORTAL_DETECTION_PATHS)) + r')(?:\?|$)',
+    re.IGNORECASE,
+)
+
+# The redirect is identical for every detection URL, so build the raw
+# response once and send it with a single write
+PORTAL_302 = (
+    'HTTP/1.1 302 Found\r\n'
+    f'Location: {REDIRECT_TARGET}\r\n'
+    'Cache-Control: no-cache, no-store, must-revalidate\r\n'
+    'Content-Length: 0\r\n'
+    'Connection: close\r\n'
+    '\r\n'
+).encode('ascii')
+
+# Only the headers WiFi Connect and the portal UI actually use are forwarded.
+# Accept-Encoding is left out on purpose: Content-Encoding isn't passed back,
+# so WiFi Connect must answer with an uncompressed body.
+FORWARD_REQUEST_HEADERS = ('User-Agent', 'Accept', 'Accept-Language', 'Content-Type', 'Cookie', 'Referer')
+FORWARD_RESPONSE_HEADERS = ('Content-Type', 'Content-Length', 'Set-Cookie', 'Location', 'Cache-Control')
+# Cached entries get their own Content-Length/Cache-Control and never carry cookies
+CACHED_RESPONSE_HEADERS = ('Content-Type', 'Location')
+
+# Static assets of the WiFi Connect UI are fetched in bursts by every device
+# that opens the portal; keep them briefly so repeats skip the upstream hop
+CACHE_TTL = 10  # seconds
+CACHE_MAX_ENTRIES = 128
+CACHEABLE_CONTENT_TYPES = ('text/css', 'application/javascript', 'text/javascript', 'image/', 'font/')
+_response_cache = collections.OrderedDict()  # path -> (expires, status, headers, body)
+_response_cache_lock = threading.Lock()
+
+# Chunk size used when streaming proxied response bodies
+PROXY_BUFFER_SIZE = 16384
+
+# One keep-alive connection (and copy buffer) to WiFi Connect per worker thread
+_upstream = threading.local()
+
+
+def get_upstream_connection():
+    """Return this thread's persistent connection to WiFi Connect."""
+    conn = getattr(_upstream, 'conn', None)
+    if conn is None:
+        conn = http.client.HTTPConnection(WIFI_CONNECT_HOST, WIFI_CONNECT_PORT, timeout=30)
+        _upstream.conn = conn
+    return conn
+
+
+def get_copy_buffer():
+    """Return this thread's reusable buffer for streaming response bodies."""
+    buffer = getattr(_upstream, 'buffer', None)
+    if buffer is None:
+        buffer = _upstream.buffer = bytearray(PROXY_BUFFER_SIZE)
+    return buffer
+
+
+def upstream_request(method, path, headers, body=None):
+    """
+    Send a request to WiFi Connect and return the response.
+
+    The connection is kept alive between requests; if WiFi Connect closed
+    it while idle, the request is retried once on a fresh connection.
+    """
+    for attempt in range(2):
+        conn = get_upstream_connection()
+        reused = conn.sock is not None
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused or attempt:
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+
+def cache_lookup(path):
+    """Return the cached response for path, or None if missing or expired."""
+    with _response_cache_lock:
+        entry = _response_cache.get(path)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _response_cache[path]
+            return None
+        _response_cache.move_to_end(path)
+        return entry
+
+
+def cache_store(path, status, headers, body):
+    """Cache a response for CACHE_TTL seconds, evicting the least recently used."""
+    entry = (time.monotonic() + CACHE_TTL, status, headers, body)
+    with _response_cache_lock:
+        _response_cache[path] = entry
+        _response_cache.move_to_end(path)
+        while len(_response_cache) > CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+    return entry
+
+
+def select_headers(response, names):
+    """Return the (name, value) pairs of the given headers present on an upstream response."""
+    selected = []
+    for name in names:
+        for value in response.headers.get_all(name, ()):
+            selected.append((name, value))
+    return selected
+
+
+def is_cacheable(method, response):
+    """Only successful static asset GETs without cookies are cached."""
+    if method != 'GET' or response.status != 200:
+        return False
+    if response.getheader('Set-Cookie') is not None:
+        return False
+    content_type = response.getheader('Content-Type', '')
+    return content_type.startswith(CACHEABLE_CONTENT_TYPES)
 
 
 class CaptivePortalProxyHandler(http.server.BaseHTTPRequestHandler):
     """HTTP handler that intercepts captive portal detection and proxies other requests."""
 
-    # Increase timeout for slow connections
-    timeout = 30
+    # Client socket timeout; a stalled client must not pin a pool worker for long
+    timeout = 10
+
+    # Responses are tiny (mostly a bare 302), so Nagle only adds latency
+    disable_nagle_algorithm = True
 
     # Security limits
     MAX_PATH_LENGTH = 2048
     MAX_BODY_SIZE = 1024 * 1024  # 1MB max for POST bodies
 
+    def setup(self):
+        """Tune the accepted client socket before handling the request."""
+        super().setup()
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    def handle_one_request(self):
+        """
+        Handle a single request, dispatching through the _DISPATCH table.
+
+        Mirrors BaseHTTPRequestHandler.handle_one_request, minus the
+        'do_' + command string building and getattr lookup per request,
+        and drops the connection if the client goes away or stalls.
+        """
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+            if len(self.raw_requestline) > 65536:
+                self.requestline = ''
+                self.request_version = ''
+                self.command = ''
+                self.send_error(414)
+                return
+            if not self.raw_requestline:
+                self.close_connection = True
+                return
+            if not self.parse_request():
+                return
+
+            handler = self._DISPATCH.get(self.command)
+            if handler is None:
+                self.send_error(501, f"Unsupported method ({self.command!r})")
+                return
+            handler(self)
+            self.wfile.flush()
+        except socket.timeout as e:
+            self.log_error("Request timed out: %r", e)
+            self.close_connection = True
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def address_string(self):
+        """Return the client IP; never reverse-resolve it, DNS is usually unavailable here."""
+        return self.client_address[0]
+
     def log_message(self, format, *args):
         """Custom logging format."""
-        print(f"[{self.log_date_time_string()}] {self.client_address[0]} - {format % args}")
+        logging.info(f"[{self.log_date_time_string()}] {self.address_string()} - {format % args}")
 
-    def is_portal_detection_request(self, path):
+    def is_portal_detection_request(self):
         """Check if this is a captive portal detection request."""
-        # Normalize path (remove query string) and convert to lowercase
-        clean_path = path.split('?')[0].lower()
-        return clean_path in PORTAL_DETECTION_PATHS
+        return PORTAL_DETECTION_RE.match(self.path) is not None
 
-    def handle_portal_detection(self, path):
+    def handle_portal_detection(self):
         """
         Return a 302 redirect to trigger captive portal detection.
 
@@ -103,89 +275,95 @@ class CaptivePortalProxyHandler(http.server.BaseHTTPRequestHandler):
         the expected response. By returning a redirect instead, we
         signal that internet is NOT available and trigger the portal UI.
         """
-        clean_path = path.split('?')[0].lower()
-
-        if clean_path not in PORTAL_DETECTION_PATHS:
-            return False
-
-        print(f"[PORTAL] Captive portal detection triggered: {clean_path} -> redirect to {REDIRECT_TARGET}")
+        logging.info(f"[PORTAL] Captive portal detection triggered: {self.path} -> redirect to {REDIRECT_TARGET}")
 
         # Send 302 redirect to the portal UI
         # This triggers captive portal detection on all platforms
-        try:
-            self.send_response(302)
-            self.send_header('Location', REDIRECT_TARGET)
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-            self.send_header('Content-Length', '0')
-            self.end_headers()
-        except BrokenPipeError:
-            # Client disconnected, ignore
-            pass
+        self.wfile.write(PORTAL_302)
+
+        # The device opens a new connection for the portal UI, so don't hold
+        # a pool worker waiting for another request on this one
+        self.close_connection = True
+
+    def send_cached_response(self, entry, include_body=True):
+        """Send a response from the asset cache."""
+        _, status, headers, body = entry
+        self.send_response(status)
+        for header, value in headers:
+            self.send_header(header, value)
+        self.send_header('Cache-Control', f'public, max-age={CACHE_TTL}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def stream_response_body(self, response):
+        """
+        Copy the upstream body to the client through a reused buffer.
 
-        return True
+        os.sendfile() needs a file-backed source, so it can't move data
+        between two sockets; readinto() at least avoids allocating a new
+        bytes object for every chunk.
+        """
+        buffer = get_copy_buffer()
+        view = memoryview(buffer)
+        while True:
+            count = response.readinto(buffer)
+            if not count:
+                break
+            self.wfile.write(view[:count])
 
     def proxy_request(self, method='GET', body=None):
         """Proxy the request to WiFi Connect."""
-        target_url = f"http://{WIFI_CONNECT_HOST}:{WIFI_CONNECT_PORT}{self.path}"
-        print(f"[PROXY] {method} {self.path} -> {target_url}")
+        logging.info(f"[PROXY] {method} {self.path} -> {WIFI_CONNECT_HOST}:{WIFI_CONNECT_PORT}")
 
-        try:
-            # Build request
-            req = urllib.request.Request(target_url, method=method)
+        # Copy relevant headers
+        headers = {}
+        for header in FORWARD_REQUEST_HEADERS:
+            value = self.headers.get(header)
+            if value:
+                headers[header] = value
 
-            # Copy relevant headers
-            for header, value in self.headers.items():
-                if header.lower() not in ['host', 'connection', 'content-length']:
-                    req.add_header(header, value)
+        # Set host header for the target
+        headers['Host'] = f'{WIFI_CONNECT_HOST}:{WIFI_CONNECT_PORT}'
 
-            # Set host header for the target
-            req.add_header('Host', f'{WIFI_CONNECT_HOST}:{WIFI_CONNECT_PORT}')
+        try:
+            # Send request to WiFi Connect
+            response = upstream_request(method, self.path, headers, body)
 
-            # Add body for POST/PUT requests
-            if body:
-                req.data = body
+        except socket.timeout:
+            logging.error("[ERROR] Timeout connecting to WiFi Connect")
+            self.send_error(504, "Gateway timeout")
+            return
 
-            # Send request to WiFi Connect
-            response = urllib.request.urlopen(req, timeout=30)
+        except (OSError, http.client.HTTPException) as e:
+            # WiFi Connect not available
+            logging.error(f"[ERROR] WiFi Connect not available: {e}")
+            self.send_error(502, f"WiFi Connect service unavailable")
+            return
+
+        try:
+            if is_cacheable(method, response):
+                headers = select_headers(response, CACHED_RESPONSE_HEADERS)
+                entry = cache_store(self.path, response.status, headers, response.read())
+                self.send_cached_response(entry)
+                return
 
             # Forward response back to client
-            self.send_response(response.getcode())
+            self.send_response(response.status)
 
             # Copy response headers
-            for header, value in response.headers.items():
-                if header.lower() not in ['connection', 'transfer-encoding', 'content-encoding']:
-                    self.send_header(header, value)
+            for header, value in select_headers(response, FORWARD_RESPONSE_HEADERS):
+                self.send_header(header, value)
             self.end_headers()
 
-            # Copy response body
-            self.wfile.write(response.read())
+            # Stream response body in chunks rather than buffering it whole
+            self.stream_response_body(response)
 
-        except urllib.error.HTTPError as e:
-            # Forward HTTP errors from WiFi Connect
-            self.send_response(e.code)
-            for header, value in e.headers.items():
-                if header.lower() not in ['connection', 'transfer-encoding']:
-                    self.send_header(header, value)
-            self.end_headers()
-            if e.fp:
-                self.wfile.write(e.fp.read())
-
-        except urllib.error.URLError as e:
-            # WiFi Connect not available
-            print(f"[ERROR] WiFi Connect not available: {e}")
-            self.send_error(502, f"WiFi Connect service unavailable")
-
-        except socket.timeout:
-            print(f"[ERROR] Timeout connecting to WiFi Connect")
-            self.send_error(504, "Gateway timeout")
-
-        except BrokenPipeError:
-            # Client disconnected mid-request, ignore
-            pass
-
-        except Exception as e:
-            print(f"[ERROR] Proxy error: {e}")
-            self.send_error(502, f"Proxy error")
+        finally:
+            if not response.isclosed():
+                # Body was not fully read, so the connection can't be reused
+                get_upstream_connection().close()
 
     def do_GET(self):
         """Handle GET requests."""
@@ -195,8 +373,15 @@ class CaptivePortalProxyHandler(http.server.BaseHTTPRequestHandler):
             return
 
         # Check for captive portal detection first
-        if self.is_portal_detection_request(self.path):
-            self.handle_portal_detection(self.path)
+        if self.is_portal_detection_request():
+            self.handle_portal_detection()
+            return
+
+        # Serve recently fetched static assets without going upstream
+        entry = cache_lookup(self.path)
+        if entry is not None:
+            logging.info(f"[CACHE] GET {self.path}")
+            self.send_cached_response(entry)
             return
 
         # Proxy everything else to WiFi Connect
@@ -223,9 +408,20 @@ class CaptivePortalProxyHandler(http.server.BaseHTTPRequestHandler):
 
     def do_HEAD(self):
         """Handle HEAD requests."""
-        if self.is_portal_detection_request(self.path):
-            # Return redirect headers (same as GET but no body)
-            self.handle_portal_detection(self.path)
+        # Validate path length
+        if len(self.path) > self.MAX_PATH_LENGTH:
+            self.send_error(414, "URI Too Long")
+            return
+
+        # Same prebuilt 302 as GET; it carries Content-Length: 0 and no body
+        if self.is_portal_detection_request():
+            self.handle_portal_detection()
+            return
+
+        entry = cache_lookup(self.path)
+        if entry is not None:
+            logging.info(f"[CACHE] HEAD {self.path}")
+            self.send_cached_response(entry, include_body=False)
             return
 
         self.proxy_request('HEAD')
@@ -234,35 +430,155 @@ class CaptivePortalProxyHandler(http.server.BaseHTTPRequestHandler):
         """Handle OPTIONS requests."""
         self.proxy_request('OPTIONS')
 
+    # Method table used by handle_one_request
+    _DISPATCH = {
+        'GET': do_GET,
+        'POST': do_POST,
+        'HEAD': do_HEAD,
+        'OPTIONS': do_OPTIONS,
+    }
+
+
+class ThreadPoolMixIn:
+    """
+    Mix-in that hands each request to a fixed pool of worker threads.
+
+    Detection probes arrive in bursts (5-20 per device), so reusing workers
+    avoids paying thread creation for every request the way ThreadingMixIn does.
+    When every worker is busy (e.g. pinned by idle browser preconnects until
+    their timeout) and the queue is full, the request gets its own short-lived
+    thread instead, so the accept loop never blocks.
+    """
+    pool_size = 16
+
+    # Handlers only do shallow, I/O-bound work; the 8MB default stack per
+    # worker is mostly wasted address space on a Pi Zero
+    worker_stack_size = 512 * 1024
+
+    def __init__(self, *args, **kwargs):
+        self._request_queue = queue.Queue(self.pool_size)
+        self._pool_shutdown = threading.Event()
+        super().__init__(*args, **kwargs)
+
+        self._workers = []
+        previous_stack_size = threading.stack_size(self.worker_stack_size)
+        try:
+            for _ in range(self.pool_size):
+                worker = threading.Thread(target=self._process_request_worker, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        finally:
+            threading.stack_size(previous_stack_size)
+
+    def _process_request_worker(self):
+        """Pull requests off the queue until join() is called."""
+        while True:
+            item = self._request_queue.get()
+            if item is None:
+                break
+            self._handle_request(*item)
+
+    def _handle_request(self, request, client_address):
+        """Handle one request and close it (runs on a worker or overflow thread)."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        """Queue the request for the next free worker, or overflow to a new thread."""
+        try:
+            self._request_queue.put_nowait((request, client_address))
+        except queue.Full:
+            thread = threading.Thread(target=self._handle_request,
+                                      args=(request, client_address), daemon=True)
+            thread.start()
+
+    def join(self):
+        """Stop the worker threads once queued requests have been handled."""
+        if self._pool_shutdown.is_set():
+            return
+        self._pool_shutdown.set()
+        for _ in self._workers:
+            self._request_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+
 
-class ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
-    """Threaded HTTP server for handling concurrent requests."""
+class ThreadedHTTPServer(ThreadPoolMixIn, http.server.HTTPServer):
+    """Thread-pooled HTTP server for handling concurrent requests."""
     allow_reuse_address = True
-    daemon_threads = True
 
+    # Default of 5 drops SYNs when several devices probe at once; the kernel
+    # still caps this at net.core.somaxconn
+    request_queue_size = 512
 
-def check_wifi_connect_available():
-    """Check if WiFi Connect is running on port 8080."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(1)
-    result = sock.connect_ex((WIFI_CONNECT_HOST, WIFI_CONNECT_PORT))
-    sock.close()
-    return result == 0
 
+def wait_for_wifi_connect(timeout=30):
+    """
+    Wait for WiFi Connect to accept connections on its port.
 
-def wait_for_wifi_connect(max_attempts=30, delay=2):
-    """Wait for WiFi Connect to become available."""
+    Uses a non-blocking connect polled with select and an exponential
+    backoff (50ms up to 1s), so the proxy starts as soon as WiFi Connect
+    is ready instead of on the next fixed 2 second tick.
+    """
     print(f"Waiting for WiFi Connect on port {WIFI_CONNECT_PORT}...")
-    for attempt in range(max_attempts):
-        if check_wifi_connect_available():
+    address = (WIFI_CONNECT_HOST, WIFI_CONNECT_PORT)
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+
+    while True:
+        # A refused socket can't be reconnected on Linux, so use a fresh one per attempt
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            result = sock.connect_ex(address)
+            if result in (errno.EINPROGRESS, errno.EAGAIN):
+                _, writable, _ = select.select([], [sock], [], delay)
+                if writable:
+                    result = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                else:
+                    result = errno.ETIMEDOUT
+        except OSError as e:
+            result = e.errno
+        finally:
+            sock.close()
+
+        if result == 0:
             print(f"WiFi Connect is available on port {WIFI_CONNECT_PORT}")
             return True
-        print(f"  Attempt {attempt + 1}/{max_attempts}: WiFi Connect not ready...")
-        time.sleep(delay)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
     print("WARNING: WiFi Connect not available, but starting proxy anyway")
     return False
 
 
+def setup_logging():
+    """
+    Send log records through a queue drained by one background thread.
+
+    Request handlers only enqueue, so pool workers never serialize on the
+    stdout lock or wait on journald while writing their log lines.
+    """
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
 def main():
     print("=" * 60)
     print("  Captive Portal Detection Proxy")
@@ -270,6 +586,7 @@ def main():
     print(f"  Listen port: {LISTEN_PORT}")
     print(f"  WiFi Connect backend: {WIFI_CONNECT_HOST}:{WIFI_CONNECT_PORT}")
     print(f"  Redirect target: {REDIRECT_TARGET}")
+    print(f"  Listen backlog: {ThreadedHTTPServer.request_queue_size} (capped by net.core.somaxconn)")
     print("")
     print("  Strategy: Return 302 redirects for detection URLs")
     print("  This triggers captive portal UI on all platforms:")
@@ -280,7 +597,9 @@ def main():
     print("=" * 60)
 
     # Wait for WiFi Connect to be available
-    wait_for_wifi_connect(max_attempts=15, delay=2)
+    wait_for_wifi_connect(timeout=30)
+
+    log_listener = setup_logging()
 
     # Create server
     try:
@@ -295,6 +614,8 @@ def main():
     # Handle shutdown signals gracefully
     def shutdown_handler(signum, frame):
         print(f"\nReceived signal {signum}, shutting down...")
+        server.join()
+        log_listener.stop()
         server.shutdown()
         sys.exit(0)
 
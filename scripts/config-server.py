@@ -6,8 +6,17 @@ Runs on port 8081 to provide persistent configuration interface
 Compatible with Python 3.9+ (Pi OS Bullseye through Trixie)
 """
 
+import atexit
+import codecs
+import copy
+import errno
+import fcntl
+import hashlib
 import json
+import mimetypes
 import os
+import socket
+import struct
 import subprocess
 import sys
 import time
@@ -15,10 +24,29 @@ import signal
 import threading
 import tempfile
 import shlex
+import shutil
 import re
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
+# orjson is much faster and returns bytes directly; fall back to stdlib json
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+    _loads = json.loads
+
+# NetworkManager's D-Bus API (python3-dbus) answers read-only queries without
+# forking nmcli; everything falls back to nmcli when it isn't installed
+try:
+    import dbus
+except ImportError:
+    dbus = None
+
 # Check Python version
 if sys.version_info < (3, 7):
     print("Error: Python 3.7+ required")
@@ -28,6 +56,666 @@ CONFIG_FILE = "/etc/ossuary/config.json"
 UI_DIR = "/opt/ossuary/custom-ui"
 LOG_DIR = "/var/log"
 TEST_PROCESSES = {}  # Track test processes
+TEST_PROCESSES_LOCK = threading.Lock()  # Handlers run concurrently
+TEST_OUTPUT_CHUNK = 65536  # Max new output bytes returned per poll
+MAX_BODY_SIZE = 1048576  # 1MB cap on POST bodies
+
+# Characters that need /bin/sh to interpret a test command
+SHELL_META_RE = re.compile(r'[|&;<>()$`\\"\'*?\[\]#~=%\n]')
+
+# Browser commands (any case) or an explicit DISPLAY= assignment need the X display
+GUI_COMMAND_RE = re.compile(r'(?i:chromium|firefox)|DISPLAY=')
+
+# Offered by /api/timezone; encoded once since it never changes
+COMMON_TIMEZONES = (
+    'America/New_York', 'America/Chicago', 'America/Denver', 'America/Los_Angeles',
+    'America/Phoenix', 'America/Anchorage', 'Pacific/Honolulu',
+    'Europe/London', 'Europe/Paris', 'Europe/Berlin', 'Europe/Moscow',
+    'Asia/Tokyo', 'Asia/Shanghai', 'Asia/Singapore', 'Asia/Dubai',
+    'Australia/Sydney', 'Australia/Melbourne', 'Pacific/Auckland',
+    'UTC'
+)
+COMMON_TIMEZONES_JSON = _dumps(list(COMMON_TIMEZONES))
+
+# Parsed config, reused until CONFIG_FILE's mtime or size changes
+CONFIG_CACHE = {'key': None, 'data': None, 'digest': None}
+CONFIG_LOCK = threading.RLock()  # Reentrant: held across load/modify/save
+
+# Debounced save: the newest config waiting to be written, and its flush timer
+CONFIG_PENDING = {'config': None, 'timer': None}
+CONFIG_SAVE_DELAY = 0.2  # Seconds; saves within this window share one write
+
+# Debounced connection-monitor restart after schedule edits
+MONITOR_RESTART = {'timer': None}
+MONITOR_RESTART_LOCK = threading.Lock()
+MONITOR_RESTART_DELAY = 1.0  # Seconds; schedule saves within this window share one restart
+
+# Services reported by /api/services (queried in one systemctl call)
+MANAGED_SERVICES = ('wifi-connect', 'wifi-connect-manager', 'ossuary-startup', 'ossuary-web')
+
+# Request allowlists
+VALID_SERVICES = frozenset(MANAGED_SERVICES)
+VALID_ACTIONS = frozenset({'start', 'stop', 'restart'})
+VALID_POWER_STATES = frozenset({'on', 'off', '1', '0'})
+
+# Runs the independent status probes in parallel (subprocess waits release the GIL)
+STATUS_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Short-lived results for the endpoints the UI polls as a heartbeat
+SYSINFO_CACHE = {'time': 0, 'value': None}    # 5s TTL
+SERVICES_CACHE = {'time': 0, 'value': None}   # 1s TTL
+
+# (epoch second, ISO 8601 string) last formatted by now_iso(); replaced whole
+TIMESTAMP_CACHE = {'value': (0, '')}
+
+# Nearby-network scan shared by /api/nearby-networks and its compat endpoint
+SCAN_CACHE = {'time': 0, 'value': None}
+SCAN_CACHE_LOCK = threading.Lock()  # One scan at a time; waiters reuse its result
+SCAN_CACHE_TTL = 5  # Seconds
+
+# /api/status snapshot, kept fresh by refresh_status() while the UI is polling
+STATUS_CACHE = {'time': 0, 'value': None, 'last_request': 0}
+STATUS_WANTED = threading.Event()
+STATUS_REFRESH_INTERVAL = 2  # Seconds between background refreshes
+STATUS_IDLE_TIMEOUT = 30  # Stop refreshing this long after the last /api/status
+
+
+def cached(cache, ttl, compute):
+    """Return cache['value'] if it is younger than ttl seconds, else recompute it"""
+    now = time.monotonic()
+    if cache['value'] is None or now - cache['time'] >= ttl:
+        cache['value'] = compute()
+        cache['time'] = now
+    return cache['value']
+
+
+# UI assets kept in memory: url path -> (fs path, body, content type, etag, mtime_ns)
+STATIC_CACHE = {}
+STATIC_MAX_AGE = 300  # Seconds browsers may reuse an asset without revalidating
+
+
+def read_static_file(fs_path):
+    """Read a UI asset into a STATIC_CACHE entry"""
+    with open(fs_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        body = f.read()
+    content_type = mimetypes.guess_type(fs_path)[0] or 'application/octet-stream'
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    return (fs_path, body, content_type, etag, st.st_mtime_ns)
+
+
+def load_static_cache():
+    """Snapshot UI_DIR into STATIC_CACHE so page loads don't touch the SD card"""
+    STATIC_CACHE.clear()
+    for root, dirs, files in os.walk(UI_DIR):
+        for name in files:
+            fs_path = os.path.join(root, name)
+            url_path = '/' + os.path.relpath(fs_path, UI_DIR).replace(os.sep, '/')
+            try:
+                STATIC_CACHE[url_path] = read_static_file(fs_path)
+            except OSError:
+                pass
+
+
+def get_static_file(url_path):
+    """Get the cached entry for url_path, re-reading it if the file changed on disk"""
+    entry = STATIC_CACHE.get(url_path)
+    if entry is None:
+        return None
+    try:
+        if os.stat(entry[0]).st_mtime_ns != entry[4]:
+            entry = STATIC_CACHE[url_path] = read_static_file(entry[0])
+    except OSError:
+        STATIC_CACHE.pop(url_path, None)
+        return None
+    return entry
+
+
+SIOCGIFADDR = 0x8915  # Linux ioctl: get interface IPv4 address
+
+
+def get_hostname():
+    """Get the system hostname (gethostname(2) instead of forking hostname)"""
+    return socket.gethostname()
+
+
+def get_default_route_interface():
+    """Return the interface carrying the default route, or None"""
+    try:
+        with open('/proc/net/route', 'r') as f:
+            next(f)  # Header
+            for line in f:
+                fields = line.split()
+                # Iface Destination Gateway Flags ... Mask
+                if len(fields) >= 8 and fields[1] == '00000000' and fields[7] == '00000000':
+                    if int(fields[3], 16) & 0x1:  # RTF_UP
+                        return fields[0]
+    except (OSError, ValueError, StopIteration):
+        pass
+    return None
+
+
+def get_interface_ip(interface):
+    """Return the IPv4 address of an interface via SIOCGIFADDR, or ''"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            packed = fcntl.ioctl(sock.fileno(), SIOCGIFADDR,
+                                 struct.pack('256s', interface[:15].encode()))
+        return socket.inet_ntoa(packed[20:24])
+    except OSError:
+        return ''
+
+
+def get_primary_ip():
+    """Get the primary IPv4 address without forking 'hostname -I'
+
+    Prefers the default-route interface, then falls back to any other
+    configured interface (e.g. wlan0 in AP mode, which has no default route).
+    """
+    interfaces = [name for _, name in socket.if_nameindex() if name != 'lo']
+    default_interface = get_default_route_interface()
+    if default_interface in interfaces:
+        interfaces.remove(default_interface)
+        interfaces.insert(0, default_interface)
+
+    for interface in interfaces:
+        ip = get_interface_ip(interface)
+        if ip:
+            return ip
+    return ''
+
+
+def get_system_info():
+    """Collect hostname, primary IP and config URLs"""
+    hostname = get_hostname()
+    ip = get_primary_ip()
+
+    return {
+        'hostname': hostname,
+        'hostname_local': f"{hostname}.local",
+        'ip': ip,
+        'config_url': f"http://{hostname}.local:8081",
+        'config_url_ip': f"http://{ip}:8081" if ip else None
+    }
+
+
+# Environments for tools that talk to the local X display, built once (the
+# server never changes its own environment)
+DISPLAY_ENV = {**os.environ, 'DISPLAY': ':0'}
+GUI_TEST_ENV = {**DISPLAY_ENV, 'XAUTHORITY': '/home/pi/.Xauthority'}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'  # Sanity check on screenshot tool output
+
+# Absolute paths of system tools, resolved on first use
+TOOL_PATHS = {}
+
+
+def run_tool(argv, **kwargs):
+    """subprocess.run for the short-lived system tools (nmcli, systemctl, ...)
+
+    argv[0] is resolved against PATH once and then cached. With an absolute
+    path and close_fds=False, subprocess can use posix_spawn (vfork-style, no
+    page-table copy of the whole interpreter) instead of fork+exec. Skipping
+    close_fds is safe because Python opens every fd non-inheritable.
+    """
+    tool = argv[0]
+    path = TOOL_PATHS.get(tool)
+    if path is None:
+        path = TOOL_PATHS[tool] = shutil.which(tool) or tool
+    return subprocess.run([path, *argv[1:]], close_fds=False, **kwargs)
+
+
+def now_iso():
+    """Current UTC time as ISO 8601, formatted at most once per second"""
+    now = int(time.time())
+    entry = TIMESTAMP_CACHE['value']
+    if entry[0] != now:
+        entry = (now, time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now)))
+        TIMESTAMP_CACHE['value'] = entry
+    return entry[1]
+
+
+LOG_READ_LIMIT = 262144  # Max bytes of log output returned per request
+LOG_TRUNCATED_MARKER = b'[... earlier output truncated ...]\n'
+
+
+def read_command_output(cmd, timeout, limit=LOG_READ_LIMIT):
+    """Run a command and return the last limit bytes of its stdout, decoded once
+
+    Reads straight from the pipe into a buffer bounded to limit, so a chatty
+    log can't balloon memory; the process is killed after timeout. Logs are
+    printed oldest-first, so on overflow the front is dropped (up to a line
+    boundary) and a truncation marker is put in its place.
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    killer = threading.Timer(timeout, process.kill)
+    killer.start()
+    data = bytearray()
+    truncated = False
+    try:
+        while True:
+            chunk = process.stdout.read1(65536)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > limit:
+                del data[:len(data) - limit]  # Cheap: bytearray trims its front in place
+                truncated = True
+        if truncated:
+            del data[:data.find(b'\n') + 1]
+            data[:0] = LOG_TRUNCATED_MARKER
+    finally:
+        process.stdout.close()
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        killer.cancel()
+    return data.decode('utf-8', 'replace')
+
+
+PROCESS_PID_FILE = '/run/ossuary/process.pid'
+PROCESS_PIDFD = {'fd': None}  # pidfd for the process manager, reused across signals
+PROCESS_PIDFD_LOCK = threading.Lock()
+
+
+def signal_process_manager(sig):
+    """Send sig to the process manager
+
+    Holds a pidfd for it, so repeat signals don't re-read the PID file and
+    can't hit an unrelated process that reused the PID. Raises OSError
+    (FileNotFoundError when the PID file is missing) if it can't be signalled.
+    """
+    with PROCESS_PIDFD_LOCK:
+        for attempt in range(2):
+            fd = PROCESS_PIDFD['fd']
+            if fd is None:
+                with open(PROCESS_PID_FILE, 'r') as f:
+                    pid = int(f.read().strip())
+                try:
+                    fd = os.pidfd_open(pid)
+                except (AttributeError, OSError) as e:
+                    # Python < 3.9 or kernel < 5.3: plain kill
+                    if isinstance(e, OSError) and e.errno != errno.ENOSYS:
+                        raise
+                    os.kill(pid, sig)
+                    return
+                PROCESS_PIDFD['fd'] = fd
+            try:
+                signal.pidfd_send_signal(fd, sig)
+                return
+            except ProcessLookupError:
+                # Process manager was restarted; reopen from the PID file
+                os.close(fd)
+                PROCESS_PIDFD['fd'] = None
+        raise ProcessLookupError(errno.ESRCH, 'Process manager not running')
+
+
+NM_BUS_NAME = 'org.freedesktop.NetworkManager'
+NM_PATH = '/org/freedesktop/NetworkManager'
+NM_DEVICE_TYPE_WIFI = 2
+NM_SCAN_TIMEOUT = 3  # Max seconds to wait for a requested rescan to finish
+# RequestScan errors that mean a scan is already under way (LastScan will still move)
+NM_SCAN_BUSY_RE = re.compile(r'already scanning|in progress', re.IGNORECASE)
+
+# NM80211ApFlags / NM80211ApSecurityFlags bits used to describe AP security
+NM_AP_FLAGS_PRIVACY = 0x1
+NM_AP_SEC_KEY_MGMT_PSK = 0x100
+NM_AP_SEC_KEY_MGMT_802_1X = 0x200
+NM_AP_SEC_KEY_MGMT_SAE = 0x400
+NM_AP_SEC_KEY_MGMT_OWE = 0x800
+NM_AP_SEC_KEY_MGMT_OWE_TM = 0x1000
+
+
+def nm_bus():
+    """Get the system bus connection for NetworkManager, or None without python3-dbus"""
+    if dbus is None:
+        return None
+    # dbus-python hands out one shared connection per process
+    return dbus.SystemBus()
+
+
+def nm_properties(bus, path, interface):
+    """Get all D-Bus properties of a NetworkManager object"""
+    obj = bus.get_object(NM_BUS_NAME, path)
+    return obj.GetAll(interface, dbus_interface='org.freedesktop.DBus.Properties')
+
+
+def nm_last_scan(bus, path):
+    """Get when a WiFi device last finished scanning (CLOCK_BOOTTIME ms, -1 if never)"""
+    obj = bus.get_object(NM_BUS_NAME, path)
+    return int(obj.Get(NM_BUS_NAME + '.Device.Wireless', 'LastScan',
+                       dbus_interface='org.freedesktop.DBus.Properties'))
+
+
+def nm_ap_security(flags, wpa_flags, rsn_flags):
+    """Describe AP security the way nmcli's SECURITY column does"""
+    security = []
+    if flags & NM_AP_FLAGS_PRIVACY and not wpa_flags and not rsn_flags:
+        security.append('WEP')
+    if wpa_flags:
+        security.append('WPA1')
+    if rsn_flags & (NM_AP_SEC_KEY_MGMT_PSK | NM_AP_SEC_KEY_MGMT_802_1X):
+        security.append('WPA2')
+    if rsn_flags & NM_AP_SEC_KEY_MGMT_SAE:
+        security.append('WPA3')
+    if rsn_flags & (NM_AP_SEC_KEY_MGMT_OWE | NM_AP_SEC_KEY_MGMT_OWE_TM):
+        security.append('OWE')
+    if (wpa_flags | rsn_flags) & NM_AP_SEC_KEY_MGMT_802_1X:
+        security.append('802.1X')
+    return ' '.join(security)
+
+
+def nm_wifi_connection_names(bus):
+    """Get the names of NetworkManager's saved WiFi connections over D-Bus"""
+    settings = bus.get_object(NM_BUS_NAME, NM_PATH + '/Settings')
+    names = []
+    for path in settings.ListConnections(dbus_interface=NM_BUS_NAME + '.Settings'):
+        connection = bus.get_object(NM_BUS_NAME, path).GetSettings(
+            dbus_interface=NM_BUS_NAME + '.Settings.Connection')
+        info = connection.get('connection', {})
+        if info.get('type') == '802-11-wireless':
+            names.append(str(info.get('id', '')))
+    return names
+
+
+def nm_scan_access_points(bus):
+    """Rescan and list visible access points over D-Bus as (ssid, signal, security)"""
+    nm = bus.get_object(NM_BUS_NAME, NM_PATH)
+    devices = [path for path in nm.GetDevices(dbus_interface=NM_BUS_NAME)
+               if nm_properties(bus, path, NM_BUS_NAME + '.Device')['DeviceType'] == NM_DEVICE_TYPE_WIFI]
+
+    # LastScan (ms since boot) moves forward when a scan completes, so wait
+    # for that instead of a fixed sleep; scans usually take well under a second
+    last_scan = {path: nm_last_scan(bus, path) for path in devices}
+    pending = set()
+    for path in devices:
+        try:
+            bus.get_object(NM_BUS_NAME, path).RequestScan(
+                dbus.Dictionary({}, signature='sv'),
+                dbus_interface=NM_BUS_NAME + '.Device.Wireless')
+        except dbus.DBusException as e:
+            # A scan already running will still finish: wait for that one.
+            # Otherwise (e.g. not allowed while wlan0 hosts the hotspot)
+            # LastScan won't move, so list the cached results right away.
+            if not NM_SCAN_BUSY_RE.search(e.get_dbus_message() or ''):
+                continue
+        pending.add(path)
+    deadline = time.monotonic() + NM_SCAN_TIMEOUT
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.1)
+        pending = {path for path in pending if nm_last_scan(bus, path) <= last_scan[path]}
+
+    access_points = []
+    for path in devices:
+        device = bus.get_object(NM_BUS_NAME, path)
+        for ap_path in device.GetAllAccessPoints(dbus_interface=NM_BUS_NAME + '.Device.Wireless'):
+            props = nm_properties(bus, ap_path, NM_BUS_NAME + '.AccessPoint')
+            access_points.append((
+                bytes(props['Ssid']).decode('utf-8', 'replace'),
+                int(props['Strength']),
+                nm_ap_security(int(props['Flags']), int(props['WpaFlags']), int(props['RsnFlags']))
+            ))
+    return access_points
+
+
+NMCLI_ESCAPE_RE = re.compile(r'\\(.)')
+# One terse SSID:SIGNAL:SECURITY row; colons inside the SSID are escaped as \:
+NMCLI_SCAN_RE = re.compile(rb'^((?:[^:\\\n]|\\.)*):(\d*):([^:\n]*)$', re.MULTILINE)
+
+
+def nmcli_unescape(value):
+    """Undo nmcli's terse-mode escaping of ':' and '\\' in a field"""
+    if '\\' not in value:
+        return value
+    return NMCLI_ESCAPE_RE.sub(r'\1', value)
+
+
+def nmcli_scan_access_points():
+    """Rescan and list visible access points via nmcli as (ssid, signal, security)"""
+    # '--rescan yes' makes nmcli trigger a scan and list once it completes,
+    # instead of a separate rescan call plus a fixed sleep.
+    # Only request SSID,SIGNAL,SECURITY (skip BSSID — its colons break terse parsing)
+    result = run_tool(
+        ['nmcli', '-t', '-f', 'SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list', '--rescan', 'yes'],
+        capture_output=True, timeout=15
+    )
+
+    access_points = []
+    if result.returncode == 0:
+        # One regex pass over the raw output; only the fields we return get decoded
+        for ssid, signal_str, security in NMCLI_SCAN_RE.findall(result.stdout):
+            access_points.append((
+                nmcli_unescape(ssid.decode('utf-8', 'replace')).strip(),
+                int(signal_str) if signal_str else 0,
+                security.decode('utf-8', 'replace')
+            ))
+    return access_points
+
+
+def scan_wifi_networks():
+    """Scan for nearby WiFi networks, strongest first, one entry per SSID"""
+    access_points = None
+    try:
+        bus = nm_bus()
+        if bus is not None:
+            access_points = nm_scan_access_points(bus)
+            # Keep the strongest AP of each SSID, as nmcli's ordering does
+            access_points.sort(key=lambda ap: ap[1], reverse=True)
+    except Exception as e:
+        print(f"[WARN] NetworkManager D-Bus scan failed, using nmcli: {e}")
+    if access_points is None:
+        access_points = nmcli_scan_access_points()
+
+    # First entry per SSID wins; dicts keep insertion order
+    networks_by_ssid = {}
+    for ssid, signal_strength, security in access_points:
+        if ssid and ssid not in networks_by_ssid:
+            security = security.strip()
+            networks_by_ssid[ssid] = {
+                'ssid': ssid,
+                'signal': signal_strength,
+                'security': security,
+                'encrypted': security != '' and security != '--'
+            }
+
+    # Sort by signal strength
+    return sorted(networks_by_ssid.values(), key=lambda x: x['signal'], reverse=True)
+
+
+def get_cached_wifi_scan(max_age=SCAN_CACHE_TTL):
+    """scan_wifi_networks(), reusing a result younger than max_age seconds"""
+    with SCAN_CACHE_LOCK:
+        if (SCAN_CACHE['value'] is None or
+                time.monotonic() - SCAN_CACHE['time'] > max_age):
+            SCAN_CACHE['value'] = scan_wifi_networks()
+            SCAN_CACHE['time'] = time.monotonic()
+        return SCAN_CACHE['value']
+
+
+def get_wifi_connection_names():
+    """Get the names of NetworkManager's saved WiFi connections"""
+    try:
+        bus = nm_bus()
+        if bus is not None:
+            return nm_wifi_connection_names(bus)
+    except Exception as e:
+        print(f"[WARN] NetworkManager D-Bus query failed, using nmcli: {e}")
+
+    names = []
+    result = run_tool(
+        ['nmcli', '-t', '-f', 'NAME,TYPE,DEVICE', 'connection', 'show'],
+        capture_output=True, text=True, timeout=5
+    )
+    if result.returncode == 0:
+        for line in result.stdout.splitlines():
+            # TYPE and DEVICE never contain colons; NAME may (escaped)
+            parts = line.rsplit(':', 2)
+            if len(parts) == 3 and parts[1] == '802-11-wireless':
+                names.append(nmcli_unescape(parts[0]))
+    return names
+
+
+def get_stored_wifi_psk(connection):
+    """The PSK NetworkManager has stored for a connection ('' if it has none)
+
+    Returns None when there is no such connection, so one nmcli call answers
+    both "does the profile exist" and "which PSK does it hold".
+    """
+    result = run_tool(
+        ['nmcli', '-s', '-g', '802-11-wireless-security.psk', 'connection', 'show', connection],
+        capture_output=True, text=True, timeout=5
+    )
+    if result.returncode != 0:
+        return None
+    # -g escapes ':' and '\\' like terse mode
+    return nmcli_unescape(result.stdout.rstrip('\n'))
+
+
+def get_service_states():
+    """Get the active state of each managed service"""
+    # systemctl prints one state per unit, in the order given
+    result = run_tool(
+        ['systemctl', 'is-active', *MANAGED_SERVICES],
+        capture_output=True, text=True, timeout=3
+    )
+    states = result.stdout.splitlines()
+    states += [''] * (len(MANAGED_SERVICES) - len(states))
+    return {service: state.strip() for service, state in zip(MANAGED_SERVICES, states)}
+
+
+def get_status():
+    """Get WiFi/AP status for /api/status"""
+    # The two probes are independent, so run them concurrently
+    ssid_future = STATUS_EXECUTOR.submit(
+        run_tool, ['iwgetid', '-r'], capture_output=True, text=True, timeout=2)
+    ap_future = STATUS_EXECUTOR.submit(
+        run_tool, ['systemctl', 'is-active', 'wifi-connect'],
+        capture_output=True, text=True, timeout=2)
+
+    # Check WiFi status
+    try:
+        ssid = ssid_future.result().stdout.strip()
+        wifi_connected = bool(ssid)
+    except:
+        wifi_connected = False
+        ssid = ""
+
+    # Check if in AP mode
+    try:
+        ap_mode = ap_future.result().stdout.strip() == 'active'
+    except:
+        ap_mode = False
+
+    return {
+        'wifi_connected': wifi_connected,
+        'ssid': ssid,
+        'ap_mode': ap_mode,
+        'hostname': get_hostname()
+    }
+
+
+def refresh_status():
+    """Keep STATUS_CACHE fresh while the UI is polling, so /api/status never forks
+
+    Sleeps on STATUS_WANTED once nobody has asked for STATUS_IDLE_TIMEOUT seconds.
+    """
+    while True:
+        STATUS_WANTED.wait()
+        try:
+            status = get_status()
+            STATUS_CACHE['value'] = status
+            STATUS_CACHE['time'] = time.monotonic()
+        except Exception as e:
+            print(f"[ERROR] Status refresh failed: {e}")
+        if time.monotonic() - STATUS_CACHE['last_request'] > STATUS_IDLE_TIMEOUT:
+            STATUS_WANTED.clear()
+        time.sleep(STATUS_REFRESH_INTERVAL)
+
+def write_config_file(config):
+    """Atomically write config to CONFIG_FILE, skipping the write if it is unchanged"""
+    # Compact: every reader parses it with json, and it halves SD card writes
+    new_bytes = _dumps(config)
+    digest = hashlib.blake2b(new_bytes, digest_size=16).digest()
+    config_dir = os.path.dirname(CONFIG_FILE)
+    os.makedirs(config_dir, exist_ok=True)
+    with CONFIG_LOCK:
+        # Nothing changed since our last write: skip the fsync and rename
+        try:
+            st = os.stat(CONFIG_FILE)
+            if (CONFIG_CACHE['digest'] == digest and
+                    CONFIG_CACHE['key'] == (st.st_mtime_ns, st.st_size)):
+                return
+        except FileNotFoundError:
+            pass
+
+        # NamedTemporaryFile creates the file 0600 in the same directory,
+        # so os.replace stays on one filesystem and is atomic
+        with tempfile.NamedTemporaryFile('wb', dir=config_dir, prefix='.config-',
+                                         delete=False) as tf:
+            try:
+                tf.write(new_bytes)
+                tf.flush()
+                os.fsync(tf.fileno())
+            except:
+                os.unlink(tf.name)
+                raise
+        os.replace(tf.name, CONFIG_FILE)
+
+        # Refresh the cache from what we just wrote instead of re-reading it
+        st = os.stat(CONFIG_FILE)
+        CONFIG_CACHE['key'] = (st.st_mtime_ns, st.st_size)
+        CONFIG_CACHE['digest'] = digest
+
+
+def cancel_pending_save():
+    """Drop a debounced save (caller holds CONFIG_LOCK and is writing a newer config)"""
+    if CONFIG_PENDING['timer'] is not None:
+        CONFIG_PENDING['timer'].cancel()
+    CONFIG_PENDING['timer'] = None
+    CONFIG_PENDING['config'] = None
+
+
+def flush_pending_config():
+    """Write the config queued by a debounced save, if any"""
+    with CONFIG_LOCK:
+        config = CONFIG_PENDING['config']
+        CONFIG_PENDING['timer'] = None
+        CONFIG_PENDING['config'] = None
+        if config is None:
+            return
+        try:
+            write_config_file(config)
+        except Exception as e:
+            print(f"[ERROR] Failed to save config: {e}")
+
+
+atexit.register(flush_pending_config)
+
+
+def restart_connection_monitor():
+    """Restart the connection monitor so it picks up the saved schedule"""
+    with MONITOR_RESTART_LOCK:
+        MONITOR_RESTART['timer'] = None
+    try:
+        result = run_tool(['systemctl', 'restart', 'ossuary-connection-monitor'],
+                          capture_output=True, timeout=10)
+        if result.returncode != 0:
+            print(f"[WARN] Connection monitor restart failed: {result.stderr.decode(errors='replace').strip()}")
+    except Exception as e:
+        print(f"[ERROR] Failed to restart connection monitor: {e}")
+
+
+def schedule_monitor_restart():
+    """Restart the connection monitor after MONITOR_RESTART_DELAY, restarting the window on each call"""
+    with MONITOR_RESTART_LOCK:
+        if MONITOR_RESTART['timer'] is not None:
+            MONITOR_RESTART['timer'].cancel()
+        timer = threading.Timer(MONITOR_RESTART_DELAY, restart_connection_monitor)
+        timer.daemon = True
+        MONITOR_RESTART['timer'] = timer
+        timer.start()
 
 # Config schema for validation (basic type checking)
 CONFIG_SCHEMA = {
@@ -162,167 +850,216 @@ DEFAULT_CONFIG = {
 }
 
 class ConfigHandler(SimpleHTTPRequestHandler):
+    # Keep-alive: the UI's polls reuse one connection instead of a handshake
+    # each. Every response must therefore carry a Content-Length.
+    protocol_version = 'HTTP/1.1'
+    timeout = 15  # Drop idle keep-alive connections (each holds a thread)
+    disable_nagle_algorithm = True  # Small JSON replies go out immediately
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=UI_DIR, **kwargs)
 
     def send_json_response(self, data, status=200):
         """Helper to send JSON responses"""
-        self.send_response(status)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_json_body(_dumps(data), status)
+
+    def send_json_body(self, body, status=200):
+        """Send an already encoded JSON body"""
+        self._respond(status, body)
+
+    def _respond(self, status, body, content_type='application/json'):
+        """Send status line, headers and body in a single write
+
+        Small API responses are dominated by per-header overhead, so build
+        the whole response as one bytes object instead of going through
+        send_response/send_header/end_headers.
+        """
+        self.log_request(status)
+        phrase = self.responses[status][0] if status in self.responses else ''
+        self.wfile.write(
+            b'%s %d %s\r\n'
+            b'Server: %s\r\n'
+            b'Date: %s\r\n'
+            b'Content-Type: %s\r\n'
+            b'Content-Length: %d\r\n'
+            b'Access-Control-Allow-Origin: *\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Connection: %s\r\n'
+            b'\r\n%b' % (
+                self.protocol_version.encode(), status, phrase.encode(),
+                self.version_string().encode(), self.date_time_string().encode(),
+                content_type.encode(), len(body),
+                b'close' if self.close_connection else b'keep-alive', body
+            )
+        )
+
+    # Exact-path routes: path -> handler method name
+    _GET_ROUTES = {
+        '/api/status': 'handle_status',
+        '/api/startup': 'handle_get_startup',
+        '/api/services': 'handle_get_services',
+        '/api/behaviors': 'handle_get_behaviors',
+        '/api/profiles': 'handle_get_profiles',
+        '/api/config': 'handle_get_config',
+        '/api/system/info': 'handle_system_info',
+        '/api/schedule': 'handle_get_schedule',
+        '/api/timezone': 'handle_get_timezone',
+        '/api/saved-networks': 'handle_get_saved_networks',
+        '/api/nearby-networks': 'handle_get_nearby_networks',
+        '/api/screenshot': 'handle_screenshot',
+        '/api/display/power': 'handle_get_display_power',
+        '/api/process/status': 'handle_get_process_status',
+        # Legacy/WiFi Connect compatible endpoints
+        '/startup': 'handle_get_startup',
+        '/status': 'handle_status',
+        '/networks': 'handle_get_nearby_networks_compat',
+    }
+
+    # path -> (handler method name, whether it takes the request body)
+    _POST_ROUTES = {
+        '/api/startup': ('handle_save_startup', True),
+        '/api/service-control': ('handle_service_control', True),
+        '/api/test-command': ('handle_test_command', True),
+        '/api/behaviors': ('handle_save_behaviors', True),
+        '/api/process/refresh': ('handle_process_refresh', False),
+        '/api/process/restart': ('handle_process_restart', False),
+        '/api/process/stop': ('handle_process_stop', False),
+        '/api/process/start': ('handle_process_start', False),
+        '/api/startup/clear': ('handle_clear_startup', False),
+        '/api/system/reboot': ('handle_system_reboot', False),
+        '/api/schedule': ('handle_save_schedule', True),
+        '/api/timezone': ('handle_set_timezone', True),
+        '/api/saved-networks': ('handle_save_network', True),
+        '/api/saved-networks/delete': ('handle_delete_network', True),
+        '/api/saved-networks/connect': ('handle_connect_saved_network', True),
+        '/api/profiles/activate': ('handle_set_active_profile', True),
+        '/api/display/power': ('handle_set_display_power', True),
+        # WiFi Connect compatible endpoint (always available)
+        '/connect': ('handle_wifi_connect', True),
+        # Legacy endpoint
+        '/startup': ('handle_save_startup', True),
+    }
+
+    # Routes taking a path argument (/api/logs/<type>):
+    # prefix -> (handler method name, error when the argument is missing)
+    _GET_ARG_ROUTES = {
+        '/api/logs': ('handle_get_logs', 'Log type required'),
+        '/api/test-output': ('handle_test_output', 'PID required'),
+    }
+    _POST_ARG_ROUTES = {
+        '/api/stop-test': ('handle_stop_test', 'PID required'),
+    }
+
+    def _dispatch_arg_route(self, path, routes):
+        """Call the handler for a /prefix/<arg> route, return False if none matches"""
+        path_parts = path.strip('/').split('/')
+        route = routes.get('/' + '/'.join(path_parts[:2]))
+        if route is None:
+            return False
+        handler_name, missing_error = route
+        if len(path_parts) > 2:
+            getattr(self, handler_name)(path_parts[2])
+        else:
+            self.send_json_response({'error': missing_error}, 400)
+        return True
+
+    def send_static_file(self, entry):
+        """Serve a cached UI asset, answering 304 when the client's copy is current"""
+        fs_path, body, content_type, etag, mtime_ns = entry
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or
+                              etag in (tag.strip() for tag in if_none_match.split(','))):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'public, max-age={STATIC_MAX_AGE}')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'public, max-age={STATIC_MAX_AGE}')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
 
     def do_GET(self):
-        parsed_path = urlparse(self.path)
-        path_parts = parsed_path.path.strip('/').split('/')
+        path = urlparse(self.path).path
 
         # Serve index at root
-        if parsed_path.path == '/':
-            self.path = '/index.html'
-            return SimpleHTTPRequestHandler.do_GET(self)
-
-        # API endpoints
-        elif parsed_path.path.startswith('/api/'):
-            if parsed_path.path == '/api/status':
-                self.handle_status()
-            elif parsed_path.path == '/api/startup':
-                self.handle_get_startup()
-            elif parsed_path.path == '/api/services':
-                self.handle_get_services()
-            elif parsed_path.path == '/api/behaviors':
-                self.handle_get_behaviors()
-            elif parsed_path.path == '/api/profiles':
-                self.handle_get_profiles()
-            elif parsed_path.path == '/api/config':
-                self.handle_get_config()
-            elif parsed_path.path == '/api/system/info':
-                self.handle_system_info()
-            elif parsed_path.path == '/api/schedule':
-                self.handle_get_schedule()
-            elif parsed_path.path == '/api/timezone':
-                self.handle_get_timezone()
-            elif parsed_path.path == '/api/saved-networks':
-                self.handle_get_saved_networks()
-            elif parsed_path.path == '/api/nearby-networks':
-                self.handle_get_nearby_networks()
-            elif path_parts[0] == 'api' and path_parts[1] == 'logs':
-                if len(path_parts) > 2:
-                    self.handle_get_logs(path_parts[2])
-                else:
-                    self.send_json_response({'error': 'Log type required'}, 400)
-            elif path_parts[0] == 'api' and path_parts[1] == 'test-output':
-                if len(path_parts) > 2:
-                    self.handle_test_output(path_parts[2])
-                else:
-                    self.send_json_response({'error': 'PID required'}, 400)
-            elif parsed_path.path == '/api/screenshot':
-                self.handle_screenshot()
-            elif parsed_path.path == '/api/display/power':
-                self.handle_get_display_power()
-            elif parsed_path.path == '/api/process/status':
-                self.handle_get_process_status()
-            else:
+        if path == '/':
+            self.path = path = '/index.html'
+
+        handler_name = self._GET_ROUTES.get(path)
+        if handler_name:
+            getattr(self, handler_name)()
+        elif path.startswith('/api/'):
+            if not self._dispatch_arg_route(path, self._GET_ARG_ROUTES):
                 self.send_json_response({'error': 'Not found'}, 404)
-
-        # Legacy/WiFi Connect compatible endpoints
-        elif parsed_path.path == '/startup':
-            self.handle_get_startup()
-        elif parsed_path.path == '/status':
-            self.handle_status()
-        elif parsed_path.path == '/networks':
-            self.handle_get_nearby_networks_compat()
         else:
-            # Serve static files
+            # Serve static files, from memory when they were snapshotted at startup
+            entry = get_static_file(path)
+            if entry is not None:
+                return self.send_static_file(entry)
             return SimpleHTTPRequestHandler.do_GET(self)
 
+    def _read_body(self, content_length):
+        """Read the request body in chunks as it arrives
+
+        Memory grows with the bytes actually received rather than being
+        reserved up front for whatever Content-Length the client claimed.
+        """
+        chunks = []
+        remaining = content_length
+        while remaining > 0:
+            chunk = self.rfile.read1(min(remaining, 65536))
+            if not chunk:
+                break  # Client closed early; handlers see the truncated body
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
     def do_POST(self):
-        parsed_path = urlparse(self.path)
-        path_parts = parsed_path.path.strip('/').split('/')
+        path = urlparse(self.path).path
 
         # Read POST data (capped to prevent OOM on Pi)
-        content_length = int(self.headers.get('Content-Length', 0))
-        MAX_BODY_SIZE = 1048576  # 1MB
-        if content_length > MAX_BODY_SIZE:
-            self.send_json_response({'error': 'Request too large'}, 413)
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0 or content_length > MAX_BODY_SIZE:
+            # The body stays unread, so this connection can't be reused
+            self.close_connection = True
+            if content_length < 0:
+                self.send_json_response({'error': 'Invalid Content-Length'}, 400)
+            else:
+                self.send_json_response({'error': 'Request too large'}, 413)
             return
-        post_data = self.rfile.read(content_length) if content_length > 0 else b'{}'
-
-        # API endpoints
-        if parsed_path.path == '/api/startup':
-            self.handle_save_startup(post_data)
-        elif parsed_path.path == '/api/service-control':
-            self.handle_service_control(post_data)
-        elif parsed_path.path == '/api/test-command':
-            self.handle_test_command(post_data)
-        elif parsed_path.path == '/api/behaviors':
-            self.handle_save_behaviors(post_data)
-        elif parsed_path.path == '/api/process/refresh':
-            self.handle_process_refresh()
-        elif parsed_path.path == '/api/process/restart':
-            self.handle_process_restart()
-        elif parsed_path.path == '/api/process/stop':
-            self.handle_process_stop()
-        elif parsed_path.path == '/api/process/start':
-            self.handle_process_start()
-        elif parsed_path.path == '/api/startup/clear':
-            self.handle_clear_startup()
-        elif parsed_path.path == '/api/system/reboot':
-            self.handle_system_reboot()
-        elif parsed_path.path == '/api/schedule':
-            self.handle_save_schedule(post_data)
-        elif parsed_path.path == '/api/timezone':
-            self.handle_set_timezone(post_data)
-        elif parsed_path.path == '/api/saved-networks':
-            self.handle_save_network(post_data)
-        elif parsed_path.path == '/api/saved-networks/delete':
-            self.handle_delete_network(post_data)
-        elif parsed_path.path == '/api/saved-networks/connect':
-            self.handle_connect_saved_network(post_data)
-        elif parsed_path.path == '/api/profiles/activate':
-            self.handle_set_active_profile(post_data)
-        elif parsed_path.path == '/api/display/power':
-            self.handle_set_display_power(post_data)
-        # WiFi Connect compatible endpoint (always available)
-        elif parsed_path.path == '/connect':
-            self.handle_wifi_connect(post_data)
-        elif path_parts[0] == 'api' and path_parts[1] == 'stop-test':
-            if len(path_parts) > 2:
-                self.handle_stop_test(path_parts[2])
+        post_data = self._read_body(content_length) if content_length > 0 else b'{}'
+
+        route = self._POST_ROUTES.get(path)
+        if route:
+            handler_name, wants_body = route
+            if wants_body:
+                getattr(self, handler_name)(post_data)
             else:
-                self.send_json_response({'error': 'PID required'}, 400)
-        # Legacy endpoint
-        elif parsed_path.path == '/startup':
-            self.handle_save_startup(post_data)
-        else:
+                getattr(self, handler_name)()
+        elif not self._dispatch_arg_route(path, self._POST_ARG_ROUTES):
             self.send_json_response({'error': 'Not found'}, 404)
 
     def handle_status(self):
         """Get system status"""
         try:
-            # Check WiFi status
-            try:
-                result = subprocess.run(['iwgetid', '-r'], capture_output=True, text=True, timeout=2)
-                ssid = result.stdout.strip()
-                wifi_connected = bool(ssid)
-            except:
-                wifi_connected = False
-                ssid = ""
-
-            # Check if in AP mode
-            try:
-                result = subprocess.run(['systemctl', 'is-active', 'wifi-connect'],
-                                      capture_output=True, text=True, timeout=2)
-                ap_mode = result.stdout.strip() == 'active'
-            except:
-                ap_mode = False
-
-            status = {
-                'wifi_connected': wifi_connected,
-                'ssid': ssid,
-                'ap_mode': ap_mode,
-                'hostname': subprocess.run(['hostname'], capture_output=True, text=True).stdout.strip()
-            }
+            now = time.monotonic()
+            STATUS_CACHE['last_request'] = now
+            STATUS_WANTED.set()
+
+            # Probe inline only when the refresher has nothing recent (first
+            # poll, or it went idle)
+            status = STATUS_CACHE['value']
+            if status is None or now - STATUS_CACHE['time'] > 2 * STATUS_REFRESH_INTERVAL:
+                status = get_status()
+                STATUS_CACHE['value'] = status
+                STATUS_CACHE['time'] = now
 
             self.send_json_response(status)
         except Exception as e:
@@ -331,45 +1068,43 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_get_startup(self):
         """Get current startup command"""
         try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    self.send_json_response({
-                        'command': config.get('startup_command', '')
-                    })
-            else:
-                self.send_json_response({'command': ''})
+            config = self._load_config()
+            self.send_json_response({
+                'command': config.get('startup_command', '')
+            })
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
     def handle_save_startup(self, post_data):
         """Save startup command"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             command = data.get('command', '')
 
-            config = self._load_config()
-            config['startup_command'] = command
-            self._save_config(config)
-
-            # Send HUP signal to process manager to reload config
-            try:
-                with open('/run/ossuary/process.pid', 'r') as f:
-                    pid = int(f.read().strip())
-                    os.kill(pid, signal.SIGHUP)
+            with CONFIG_LOCK:
+                config = self._load_config()
+                changed = config.get('startup_command') != command
+                if changed:
+                    config['startup_command'] = command
+                    self._save_config(config)
+
+            # Autosave of an unchanged command: nothing to write or reload
+            service_reloaded = False
+            if changed:
+                # Send HUP signal to process manager to reload config
+                try:
+                    signal_process_manager(signal.SIGHUP)
                     service_reloaded = True
-            except:
-                service_reloaded = False
+                except:
+                    service_reloaded = False
 
-            # Check if service is active
-            status_result = subprocess.run(
-                ['systemctl', 'is-active', 'ossuary-startup'],
-                capture_output=True, text=True
-            )
+            # Service state comes from the shared (1s) services cache rather
+            # than a dedicated systemctl call per save
+            services = cached(SERVICES_CACHE, 1, get_service_states)
 
             response_data = {
                 'success': True,
-                'service_active': status_result.stdout.strip() == 'active',
+                'service_active': services.get('ossuary-startup') == 'active',
                 'config_reloaded': service_reloaded
             }
 
@@ -380,14 +1115,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_get_services(self):
         """Get service status"""
         try:
-            services = {}
-            for service in ['wifi-connect', 'wifi-connect-manager', 'ossuary-startup', 'ossuary-web']:
-                result = subprocess.run(
-                    ['systemctl', 'is-active', service],
-                    capture_output=True, text=True, timeout=2
-                )
-                services[service] = result.stdout.strip()
-
+            services = cached(SERVICES_CACHE, 1, get_service_states)
             self.send_json_response(services)
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
@@ -395,28 +1123,32 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_service_control(self, post_data):
         """Control system services"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             service = data.get('service')
             action = data.get('action')
 
             # Validate service name
-            if service not in ['wifi-connect', 'wifi-connect-manager', 'ossuary-startup', 'ossuary-web']:
+            if not isinstance(service, str) or service not in VALID_SERVICES:
                 self.send_json_response({'error': 'Invalid service'}, 400)
                 return
 
             # Validate action
-            if action not in ['start', 'stop', 'restart']:
+            if not isinstance(action, str) or action not in VALID_ACTIONS:
                 self.send_json_response({'error': 'Invalid action'}, 400)
                 return
 
             # Execute action
-            result = subprocess.run(
+            result = run_tool(
                 ['systemctl', action, service],
                 capture_output=True, text=True, timeout=10
             )
 
+            # State changed; don't serve the cached /api/services or /api/status answer
+            SERVICES_CACHE['value'] = None
+            STATUS_CACHE['value'] = None
+
             # Check new status
-            status_result = subprocess.run(
+            status_result = run_tool(
                 ['systemctl', 'is-active', service],
                 capture_output=True, text=True, timeout=2
             )
@@ -462,11 +1194,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
 
             # Try log file first if specified
             if 'file' in config and os.path.exists(config['file']):
-                result = subprocess.run(
-                    ['tail', '-n', str(lines), config['file']],
-                    capture_output=True, text=True, timeout=5
-                )
-                logs = result.stdout
+                logs = read_command_output(['tail', '-n', str(lines), config['file']], timeout=5)
 
             # Fall back to journalctl
             if not logs:
@@ -478,8 +1206,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 else:
                     cmd = ['journalctl', '-u', config['unit'], '-n', str(lines), '--no-pager']
 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                logs = result.stdout or f"No logs available for {log_type}"
+                logs = read_command_output(cmd, timeout=10) or f"No logs available for {log_type}"
 
             self.send_json_response({'logs': logs})
         except Exception as e:
@@ -495,7 +1222,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         global TEST_PROCESSES
 
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             command = data.get('command', '')
 
             if not command:
@@ -510,48 +1237,73 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'error': 'Command too long (max 4096 chars)'}, 400)
                 return
 
-            # Limit concurrent test processes
-            if len(TEST_PROCESSES) >= 5:
-                self.send_json_response({'error': 'Too many test processes running'}, 429)
-                return
+            with TEST_PROCESSES_LOCK:
+                # Limit concurrent test processes
+                if len(TEST_PROCESSES) >= 5:
+                    self.send_json_response({'error': 'Too many test processes running'}, 429)
+                    return
 
-            # Log the command being tested (for audit trail)
-            print(f"[TEST] Running command: {command[:100]}{'...' if len(command) > 100 else ''}")
+                # Log the command being tested (for audit trail)
+                print(f"[TEST] Running command: {command[:100]}{'...' if len(command) > 100 else ''}")
 
-            # Create temporary file for output
-            output_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.log')
-            output_filename = output_file.name
-            output_file.close()
+                # Create temporary file for output
+                output_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.log')
+                output_filename = output_file.name
+                output_file.close()
 
-            # Detect if this is a GUI app
-            is_gui = 'chromium' in command.lower() or 'firefox' in command.lower() or 'DISPLAY=' in command
+                # Detect if this is a GUI app
+                is_gui = GUI_COMMAND_RE.search(command) is not None
 
-            # Build the test command with proper quoting for display vars
-            if is_gui:
-                # For GUI apps, set display variables
-                test_cmd = f"export DISPLAY=:0; export XAUTHORITY=/home/pi/.Xauthority; {command}"
-            else:
-                test_cmd = command
-
-            # Start the process with properly managed file handle
-            output_handle = open(output_filename, 'w')
-            process = subprocess.Popen(
-                test_cmd,
-                shell=True,  # Required for user commands with pipes/redirects
-                stdout=output_handle,
-                stderr=subprocess.STDOUT,
-                preexec_fn=os.setsid,  # Create new process group for easy cleanup
-                cwd='/tmp'  # Run from safe directory
-            )
+                # GUI apps need the display variables; pass them through env
+                # rather than prefixing shell exports
+                env = None
+                if is_gui:
+                    env = GUI_TEST_ENV
 
-            # Store process info including file handle for proper cleanup
-            TEST_PROCESSES[str(process.pid)] = {
-                'process': process,
-                'output_file': output_filename,
-                'output_handle': output_handle,
-                'start_time': time.time(),
-                'command': command[:100]  # Store for logging
-            }
+                # Start the process with properly managed file handle
+                output_handle = open(output_filename, 'w')
+                try:
+                    process = None
+                    # Plain commands are exec'd directly; only pipes, redirects,
+                    # quoting, globbing etc. need a /bin/sh in between
+                    if not SHELL_META_RE.search(command):
+                        try:
+                            process = subprocess.Popen(
+                                shlex.split(command),
+                                stdout=output_handle,
+                                stderr=subprocess.STDOUT,
+                                start_new_session=True,  # New session + process group for easy cleanup
+                                cwd='/tmp',  # Run from safe directory
+                                env=env
+                            )
+                        except OSError:
+                            # e.g. command not found: let the shell report it in the output
+                            process = None
+                    if process is None:
+                        process = subprocess.Popen(
+                            command,
+                            shell=True,  # Required for user commands with pipes/redirects
+                            stdout=output_handle,
+                            stderr=subprocess.STDOUT,
+                            start_new_session=True,
+                            cwd='/tmp',
+                            env=env
+                        )
+                except:
+                    output_handle.close()
+                    os.unlink(output_filename)
+                    raise
+
+                # Store process info including file handle for proper cleanup
+                TEST_PROCESSES[str(process.pid)] = {
+                    'process': process,
+                    'output_file': output_filename,
+                    'output_handle': output_handle,
+                    'start_time': time.time(),
+                    'command': command[:100],  # Store for logging
+                    'offset': 0,  # Bytes of output already returned to the client
+                    'decoder': codecs.getincrementaldecoder('utf-8')('replace')
+                }
 
             self.send_json_response({
                 'pid': process.pid,
@@ -569,42 +1321,42 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         global TEST_PROCESSES
 
         try:
-            if pid_str not in TEST_PROCESSES:
+            with TEST_PROCESSES_LOCK:
+                proc_info = TEST_PROCESSES.get(pid_str)
+            if proc_info is None:
                 self.send_json_response({'error': 'Process not found'}, 404)
                 return
 
-            proc_info = TEST_PROCESSES[pid_str]
             process = proc_info['process']
             output_file = proc_info['output_file']
 
-            # Read output
-            output = ""
-            if os.path.exists(output_file):
-                with open(output_file, 'r') as f:
-                    output = f.read()
-
-            # Check if process is still running
+            # Check if process is still running (before reading, so everything
+            # it wrote before exiting is picked up below)
             poll_result = process.poll()
             running = poll_result is None
 
+            # Only return output written since the previous poll; once the
+            # process has exited, drain whatever is left
+            with TEST_PROCESSES_LOCK:
+                chunk = b''
+                if os.path.exists(output_file):
+                    with open(output_file, 'rb') as f:
+                        f.seek(proc_info['offset'])
+                        chunk = f.read(TEST_OUTPUT_CHUNK if running else -1)
+                proc_info['offset'] += len(chunk)
+                output = proc_info['decoder'].decode(chunk, final=not running)
+                offset = proc_info['offset']
+
             response = {
                 'output': output,
                 'running': running,
-                'exit_code': poll_result if not running else None
+                'exit_code': poll_result if not running else None,
+                'offset': offset
             }
 
             # Clean up if process ended
             if not running:
-                try:
-                    if 'output_handle' in proc_info:
-                        proc_info['output_handle'].close()
-                except:
-                    pass
-                try:
-                    os.unlink(output_file)
-                except:
-                    pass
-                del TEST_PROCESSES[pid_str]
+                cleanup_test(pid_str)
 
             self.send_json_response(response)
 
@@ -616,38 +1368,15 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         global TEST_PROCESSES
 
         try:
-            if pid_str not in TEST_PROCESSES:
+            # Claim the entry so a concurrent poll doesn't clean it up underneath us
+            with TEST_PROCESSES_LOCK:
+                proc_info = TEST_PROCESSES.pop(pid_str, None)
+            if proc_info is None:
                 self.send_json_response({'error': 'Process not found'}, 404)
                 return
 
-            proc_info = TEST_PROCESSES[pid_str]
-            process = proc_info['process']
-            output_file = proc_info['output_file']
-
-            # Kill the process group
-            try:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                time.sleep(1)
-                if process.poll() is None:
-                    os.killpg(os.getpgid(process.pid), signal.SIGKILL)
-            except:
-                # Fallback to just killing the process
-                process.terminate()
-                time.sleep(1)
-                if process.poll() is None:
-                    process.kill()
-
-            # Clean up file handle and file
-            try:
-                if 'output_handle' in proc_info:
-                    proc_info['output_handle'].close()
-            except:
-                pass
-            try:
-                os.unlink(output_file)
-            except:
-                pass
-            del TEST_PROCESSES[pid_str]
+            stop_test_process(proc_info['process'])
+            release_test_output(proc_info)
 
             self.send_json_response({'success': True})
 
@@ -666,7 +1395,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def _signal_connection_monitor(self):
         """Send SIGHUP to connection monitor to reload cached config"""
         try:
-            result = subprocess.run(
+            result = run_tool(
                 ['pgrep', '-f', 'connection-monitor.sh'],
                 capture_output=True, text=True, timeout=3
             )
@@ -680,12 +1409,13 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_save_behaviors(self, post_data):
         """Save behavior settings (merges with existing, preserving unset keys)"""
         try:
-            data = json.loads(post_data)
-            config = self._load_config()
-            if 'behaviors' not in config:
-                config['behaviors'] = {}
-            config['behaviors'].update(data)
-            self._save_config(config)
+            data = _loads(post_data)
+            with CONFIG_LOCK:
+                config = self._load_config()
+                if 'behaviors' not in config:
+                    config['behaviors'] = {}
+                config['behaviors'].update(data)
+                self._save_config(config)
             self._signal_connection_monitor()
             self.send_json_response({'success': True})
         except Exception as e:
@@ -707,28 +1437,27 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_set_active_profile(self, post_data):
         """Switch the active profile and trigger process manager reload"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             profile_name = data.get('profile', '').strip()
             if not profile_name:
                 self.send_json_response({'error': 'Profile name required'}, 400)
                 return
-            config = self._load_config()
-            if profile_name not in config.get('profiles', {}):
+            with CONFIG_LOCK:
+                config = self._load_config()
+                known = profile_name in config.get('profiles', {})
+                if known:
+                    config['active_profile'] = profile_name
+                    self._save_config(config)
+            if not known:
                 self.send_json_response({'error': f'Unknown profile: {profile_name}'}, 404)
                 return
-            config['active_profile'] = profile_name
-            self._save_config(config)
             # Signal process manager to reload with new profile
-            pid_file = '/run/ossuary/process.pid'
             reloaded = False
-            if os.path.exists(pid_file):
-                try:
-                    with open(pid_file, 'r') as f:
-                        pid = int(f.read().strip())
-                    os.kill(pid, signal.SIGHUP)
-                    reloaded = True
-                except (ValueError, OSError):
-                    pass
+            try:
+                signal_process_manager(signal.SIGHUP)
+                reloaded = True
+            except (ValueError, OSError):
+                pass
             self.send_json_response({'success': True, 'active_profile': profile_name, 'process_reloaded': reloaded})
         except json.JSONDecodeError:
             self.send_json_response({'error': 'Invalid JSON'}, 400)
@@ -746,17 +1475,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_system_info(self):
         """Get system information"""
         try:
-            hostname = subprocess.run(['hostname'], capture_output=True, text=True).stdout.strip()
-            ip_result = subprocess.run(['hostname', '-I'], capture_output=True, text=True)
-            ip = ip_result.stdout.strip().split()[0] if ip_result.stdout.strip() else ''
-
-            info = {
-                'hostname': hostname,
-                'hostname_local': f"{hostname}.local",
-                'ip': ip,
-                'config_url': f"http://{hostname}.local:8081",
-                'config_url_ip': f"http://{ip}:8081" if ip else None
-            }
+            info = cached(SYSINFO_CACHE, 5, get_system_info)
             self.send_json_response(info)
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
@@ -765,21 +1484,19 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         """Trigger page refresh in running process"""
         try:
             # Send HUP signal to process manager
-            pid_file = '/run/ossuary/process.pid'
-            if os.path.exists(pid_file):
-                with open(pid_file, 'r') as f:
-                    pid = int(f.read().strip())
-                os.kill(pid, signal.SIGHUP)
-                self.send_json_response({'success': True, 'message': 'Refresh signal sent'})
-            else:
+            try:
+                signal_process_manager(signal.SIGHUP)
+            except FileNotFoundError:
                 self.send_json_response({'error': 'Process not running'}, 404)
+                return
+            self.send_json_response({'success': True, 'message': 'Refresh signal sent'})
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
     def handle_process_restart(self):
         """Restart the running process"""
         try:
-            result = subprocess.run(
+            result = run_tool(
                 ['systemctl', 'restart', 'ossuary-startup'],
                 capture_output=True, text=True, timeout=10
             )
@@ -803,7 +1520,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'success': True, 'message': f'Stopped process {pid}'})
             else:
                 # Try stopping via systemctl
-                result = subprocess.run(
+                result = run_tool(
                     ['systemctl', 'stop', 'ossuary-startup'],
                     capture_output=True, text=True, timeout=10
                 )
@@ -818,7 +1535,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_process_start(self):
         """Start the process service"""
         try:
-            result = subprocess.run(
+            result = run_tool(
                 ['systemctl', 'start', 'ossuary-startup'],
                 capture_output=True, text=True, timeout=10
             )
@@ -834,7 +1551,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         """Get current process status"""
         try:
             # Get service state
-            result = subprocess.run(
+            result = run_tool(
                 ['systemctl', 'show', 'ossuary-startup', '--property=ActiveState,SubState'],
                 capture_output=True, text=True, timeout=5
             )
@@ -853,10 +1570,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
             # Get current command from config
             command = ''
             try:
-                if os.path.exists(CONFIG_FILE):
-                    with open(CONFIG_FILE, 'r') as f:
-                        config = json.load(f)
-                        command = config.get('startup_command', '')
+                command = self._load_config().get('startup_command', '')
             except:
                 pass
 
@@ -885,9 +1599,10 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_clear_startup(self):
         """Clear the startup command"""
         try:
-            config = self._load_config()
-            config['startup_command'] = ''
-            self._save_config(config)
+            with CONFIG_LOCK:
+                config = self._load_config()
+                config['startup_command'] = ''
+                self._save_config(config)
             self.send_json_response({'success': True, 'message': 'Startup command cleared'})
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
@@ -901,62 +1616,85 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
+    def send_png_headers(self, length):
+        """Send the headers for an uncacheable PNG response of the given size"""
+        self.send_response(200)
+        self.send_header('Content-type', 'image/png')
+        self.send_header('Content-Length', length)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
     def handle_screenshot(self):
         """Capture a screenshot of the current display"""
         try:
-            screenshot_path = '/tmp/ossuary-screenshot.png'
-
-            # Try different screenshot tools in order of preference
-            success = False
-
-            # Method 1: scrot (works on X11)
-            if not success:
-                result = subprocess.run(
-                    ['scrot', screenshot_path],
-                    capture_output=True, timeout=10,
-                    env={**os.environ, 'DISPLAY': ':0'}
-                )
-                if result.returncode == 0 and os.path.exists(screenshot_path):
-                    success = True
-
-            # Method 2: grim (works on Wayland)
-            if not success:
-                result = subprocess.run(
-                    ['grim', screenshot_path],
-                    capture_output=True, timeout=10
-                )
-                if result.returncode == 0 and os.path.exists(screenshot_path):
-                    success = True
-
-            # Method 3: gnome-screenshot
-            if not success:
-                result = subprocess.run(
+            image_data = None
+            timed_out = False
+
+            # scrot (X11) and grim (Wayland) write the PNG straight into the
+            # pipe, so nothing touches the filesystem. A missing or hung tool
+            # just moves on to the next one.
+            for cmd, env in (
+                (['scrot', '-o', '/dev/stdout'], DISPLAY_ENV),
+                (['grim', '-'], None),
+            ):
+                try:
+                    result = subprocess.run(cmd, capture_output=True, timeout=10, env=env)
+                except FileNotFoundError:
+                    continue
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    continue
+                if result.returncode == 0 and result.stdout.startswith(PNG_SIGNATURE):
+                    image_data = result.stdout
+                    break
+
+            # Older scrot (e.g. Bullseye's) picks the format from the file
+            # extension and can't save to /dev/stdout; gnome-screenshot can
+            # only write to a file
+            screenshot_file = None
+            if image_data is None:
+                screenshot_path = '/tmp/ossuary-screenshot.png'
+                for cmd in (
+                    ['scrot', '-o', screenshot_path],
                     ['gnome-screenshot', '-f', screenshot_path],
-                    capture_output=True, timeout=10,
-                    env={**os.environ, 'DISPLAY': ':0'}
-                )
-                if result.returncode == 0 and os.path.exists(screenshot_path):
-                    success = True
-
-            if success and os.path.exists(screenshot_path):
-                # Read and return the image
-                with open(screenshot_path, 'rb') as f:
-                    image_data = f.read()
-                os.unlink(screenshot_path)
-
-                self.send_response(200)
-                self.send_header('Content-type', 'image/png')
-                self.send_header('Content-Length', len(image_data))
-                self.send_header('Cache-Control', 'no-cache')
-                self.end_headers()
-                self.wfile.write(image_data)
+                ):
+                    try:
+                        result = subprocess.run(cmd, capture_output=True, timeout=10,
+                                                env=DISPLAY_ENV)
+                    except FileNotFoundError:
+                        continue
+                    except subprocess.TimeoutExpired:
+                        timed_out = True
+                        continue
+                    if result.returncode == 0 and os.path.exists(screenshot_path):
+                        screenshot_file = open(screenshot_path, 'rb')
+                        os.unlink(screenshot_path)  # The open handle keeps the data
+                        break
+
+            # Once the headers are out, a failed body write (client gone) can't
+            # be answered with another response: drop the connection instead
+            if image_data:
+                self.send_png_headers(len(image_data))
+                try:
+                    self.wfile.write(image_data)
+                except OSError:
+                    self.close_connection = True
+            elif screenshot_file is not None:
+                with screenshot_file:
+                    self.send_png_headers(os.fstat(screenshot_file.fileno()).st_size)
+                    try:
+                        # sendfile(2): page cache straight to the socket, no
+                        # PNG-sized copy through Python
+                        self.connection.sendfile(screenshot_file)
+                    except OSError:
+                        self.close_connection = True
+            elif timed_out:
+                self.send_json_response({'error': 'Screenshot timed out'}, 500)
             else:
                 self.send_json_response({
                     'error': 'Screenshot failed - no compatible tool found (install scrot or grim)'
                 }, 500)
 
-        except subprocess.TimeoutExpired:
-            self.send_json_response({'error': 'Screenshot timed out'}, 500)
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
@@ -964,18 +1702,18 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         """Get current display power state"""
         try:
             # Try vcgencmd (Raspberry Pi specific)
-            result = subprocess.run(
+            result = run_tool(
                 ['vcgencmd', 'display_power'],
-                capture_output=True, text=True, timeout=5
+                capture_output=True, timeout=5
             )
 
             if result.returncode == 0:
+                # Output is like b"display_power=1" or b"display_power=0"
                 output = result.stdout.strip()
-                # Output is like "display_power=1" or "display_power=0"
-                power_on = '=1' in output
+                power_on = b'=1' in output
                 self.send_json_response({
                     'power': 'on' if power_on else 'off',
-                    'raw': output
+                    'raw': output.decode('ascii', 'replace')
                 })
             else:
                 self.send_json_response({
@@ -988,17 +1726,17 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_set_display_power(self, post_data):
         """Set display power state (on/off)"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             power = data.get('power', '').lower()
 
-            if power not in ['on', 'off', '1', '0']:
+            if power not in VALID_POWER_STATES:
                 self.send_json_response({'error': 'power must be "on" or "off"'}, 400)
                 return
 
             power_value = '1' if power in ['on', '1'] else '0'
 
             # Use vcgencmd (Raspberry Pi specific)
-            result = subprocess.run(
+            result = run_tool(
                 ['vcgencmd', 'display_power', power_value],
                 capture_output=True, text=True, timeout=5
             )
@@ -1029,28 +1767,68 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 result[key] = value
         return result
 
+    @staticmethod
+    def _find_saved_network(config, ssid):
+        """Return (index, entry) of ssid in saved_networks, or (None, None)"""
+        for idx, network in enumerate(config.get('saved_networks', [])):
+            if network.get('ssid') == ssid:
+                return idx, network
+        return None, None
+
     def _load_config(self):
-        """Load config with defaults (deep merge preserves nested keys)"""
-        config = dict(DEFAULT_CONFIG)
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    saved_config = json.load(f)
-                    config = self._deep_merge(DEFAULT_CONFIG, saved_config)
-            except:
-                pass
-        return config
+        """Load config with defaults (deep merge preserves nested keys)
+
+        The merged config is cached and only re-read when the file's mtime
+        or size changes, so most calls cost a single stat(). Callers get a
+        deep copy they are free to modify.
+        """
+        with CONFIG_LOCK:
+            # A debounced save not yet on disk is newer than the file
+            if CONFIG_PENDING['config'] is not None:
+                return copy.deepcopy(CONFIG_CACHE['data'])
+
+        try:
+            st = os.stat(CONFIG_FILE)
+        except OSError:
+            return copy.deepcopy(DEFAULT_CONFIG)
+
+        key = (st.st_mtime_ns, st.st_size)
+        with CONFIG_LOCK:
+            if CONFIG_CACHE['key'] != key:
+                config = DEFAULT_CONFIG
+                try:
+                    with open(CONFIG_FILE, 'rb') as f:
+                        saved_config = _loads(f.read())
+                        config = self._deep_merge(DEFAULT_CONFIG, saved_config)
+                except:
+                    pass
+                CONFIG_CACHE['key'] = key
+                CONFIG_CACHE['data'] = copy.deepcopy(config)
+                CONFIG_CACHE['digest'] = None
+            return copy.deepcopy(CONFIG_CACHE['data'])
 
     def _save_config(self, config):
         """Save config to file (atomic write to survive power loss)"""
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        tmp_file = CONFIG_FILE + '.tmp'
-        with open(tmp_file, 'w') as f:
-            json.dump(config, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-        os.chmod(tmp_file, 0o600)
-        os.rename(tmp_file, CONFIG_FILE)
+        with CONFIG_LOCK:
+            # This write supersedes any debounced save still waiting
+            cancel_pending_save()
+            write_config_file(config)
+            CONFIG_CACHE['data'] = copy.deepcopy(self._deep_merge(DEFAULT_CONFIG, config))
+
+    def _schedule_save(self, config):
+        """Save config after CONFIG_SAVE_DELAY, coalescing saves that land in between
+
+        For bookkeeping nobody else waits on (e.g. last_connected). _load_config
+        sees the pending config right away.
+        """
+        with CONFIG_LOCK:
+            CONFIG_CACHE['data'] = copy.deepcopy(self._deep_merge(DEFAULT_CONFIG, config))
+            CONFIG_PENDING['config'] = config
+            if CONFIG_PENDING['timer'] is None:
+                timer = threading.Timer(CONFIG_SAVE_DELAY, flush_pending_config)
+                timer.daemon = True  # atexit flushes on shutdown
+                CONFIG_PENDING['timer'] = timer
+                timer.start()
 
     # Schedule handlers
     def handle_get_schedule(self):
@@ -1065,15 +1843,15 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_save_schedule(self, post_data):
         """Save schedule configuration"""
         try:
-            data = json.loads(post_data)
-            config = self._load_config()
-            config['schedule'] = data
-            self._save_config(config)
-            # Notify scheduler service to restart (picks up new config)
-            result = subprocess.run(['systemctl', 'restart', 'ossuary-connection-monitor'],
-                         capture_output=True, timeout=10)
-            reloaded = result.returncode == 0
-            self.send_json_response({'success': True, 'monitor_reloaded': reloaded})
+            data = _loads(post_data)
+            with CONFIG_LOCK:
+                config = self._load_config()
+                config['schedule'] = data
+                self._save_config(config)
+            self.send_json_response({'success': True})
+            # Restart the scheduler service off the request path; a burst of
+            # edits collapses into one restart
+            schedule_monitor_restart()
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
@@ -1081,50 +1859,43 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         """Get current timezone"""
         try:
             # Get system timezone
-            result = subprocess.run(['timedatectl', 'show', '--property=Timezone', '--value'],
-                                  capture_output=True, text=True, timeout=5)
+            result = run_tool(['timedatectl', 'show', '--property=Timezone', '--value'],
+                              capture_output=True, text=True, timeout=5)
             system_tz = result.stdout.strip() if result.returncode == 0 else 'UTC'
 
             # Get config timezone setting
             config = self._load_config()
             config_tz = config.get('schedule', {}).get('timezone', 'auto')
 
-            # Get list of common timezones
-            common_timezones = [
-                'America/New_York', 'America/Chicago', 'America/Denver', 'America/Los_Angeles',
-                'America/Phoenix', 'America/Anchorage', 'Pacific/Honolulu',
-                'Europe/London', 'Europe/Paris', 'Europe/Berlin', 'Europe/Moscow',
-                'Asia/Tokyo', 'Asia/Shanghai', 'Asia/Singapore', 'Asia/Dubai',
-                'Australia/Sydney', 'Australia/Melbourne', 'Pacific/Auckland',
-                'UTC'
-            ]
-
-            self.send_json_response({
+            # Only the three dynamic fields are encoded per request; the
+            # timezone list is spliced in pre-encoded
+            body = _dumps({
                 'system_timezone': system_tz,
                 'config_timezone': config_tz,
-                'effective_timezone': system_tz if config_tz == 'auto' else config_tz,
-                'available_timezones': common_timezones
+                'effective_timezone': system_tz if config_tz == 'auto' else config_tz
             })
+            self.send_json_body(body[:-1] + b',"available_timezones":' + COMMON_TIMEZONES_JSON + b'}')
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
     def handle_set_timezone(self, post_data):
         """Set timezone"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             timezone = data.get('timezone', 'auto')
 
-            config = self._load_config()
-            if 'schedule' not in config:
-                config['schedule'] = DEFAULT_CONFIG.get('schedule', {})
-            config['schedule']['timezone'] = timezone
-
-            # If not 'auto', also set system timezone
+            # If not 'auto', also set system timezone (outside CONFIG_LOCK,
+            # so other saves don't wait on timedatectl)
             if timezone != 'auto':
-                subprocess.run(['timedatectl', 'set-timezone', timezone],
-                             capture_output=True, timeout=10)
+                run_tool(['timedatectl', 'set-timezone', timezone],
+                         capture_output=True, timeout=10)
 
-            self._save_config(config)
+            with CONFIG_LOCK:
+                config = self._load_config()
+                if 'schedule' not in config:
+                    config['schedule'] = DEFAULT_CONFIG.get('schedule', {})
+                config['schedule']['timezone'] = timezone
+                self._save_config(config)
             self.send_json_response({'success': True, 'timezone': timezone})
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
@@ -1139,16 +1910,8 @@ class ConfigHandler(SimpleHTTPRequestHandler):
             # Also get networks from NetworkManager
             nm_networks = []
             try:
-                result = subprocess.run(
-                    ['nmcli', '-t', '-f', 'NAME,TYPE,DEVICE', 'connection', 'show'],
-                    capture_output=True, text=True, timeout=5
-                )
-                if result.returncode == 0:
-                    for line in result.stdout.strip().split('\n'):
-                        if line:
-                            parts = line.split(':')
-                            if len(parts) >= 2 and parts[1] == '802-11-wireless':
-                                nm_networks.append({'ssid': parts[0], 'from_nm': True})
+                nm_networks = [{'ssid': name, 'from_nm': True}
+                               for name in get_wifi_connection_names()]
             except:
                 pass
 
@@ -1162,7 +1925,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_save_network(self, post_data):
         """Save a network to the list"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             ssid = data.get('ssid', '').strip()
             password = data.get('password', '')
             notes = data.get('notes', '')
@@ -1173,59 +1936,63 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'error': 'SSID required'}, 400)
                 return
 
-            config = self._load_config()
-            if 'saved_networks' not in config:
-                config['saved_networks'] = []
+            with CONFIG_LOCK:
+                config = self._load_config()
+                if 'saved_networks' not in config:
+                    config['saved_networks'] = []
 
-            # Check if network already exists
-            existing = next((n for n in config['saved_networks'] if n['ssid'] == ssid), None)
+                # Check if network already exists
+                idx, existing = self._find_saved_network(config, ssid)
 
-            network_entry = {
-                'ssid': ssid,
-                'password': password,  # Note: In production, this should be encrypted
-                'priority': priority,
-                'auto_connect': auto_connect,
-                'notes': notes,
-                'added_at': existing['added_at'] if existing else time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'last_connected': existing.get('last_connected') if existing else None
-            }
+                network_entry = {
+                    'ssid': ssid,
+                    'password': password,  # Note: In production, this should be encrypted
+                    'priority': priority,
+                    'auto_connect': auto_connect,
+                    'notes': notes,
+                    'added_at': existing['added_at'] if existing else now_iso(),
+                    'last_connected': existing.get('last_connected') if existing else None
+                }
 
-            if existing:
-                # Update existing
-                idx = config['saved_networks'].index(existing)
-                config['saved_networks'][idx] = network_entry
-            else:
-                # Add new
-                config['saved_networks'].append(network_entry)
+                if existing:
+                    # Update existing
+                    config['saved_networks'][idx] = network_entry
+                else:
+                    # Add new
+                    config['saved_networks'].append(network_entry)
 
-            self._save_config(config)
+                self._save_config(config)
 
             # Also add to NetworkManager if password provided
             if password:
                 try:
                     # Check if connection already exists in NM
-                    check = subprocess.run(
+                    check = run_tool(
                         ['nmcli', 'connection', 'show', ssid],
                         capture_output=True, timeout=5
                     )
                     if check.returncode == 0:
                         # Update existing
-                        subprocess.run(
+                        nm_result = run_tool(
                             ['nmcli', 'connection', 'modify', ssid,
                              'wifi-sec.psk', password],
                             capture_output=True, timeout=10
                         )
                     else:
                         # Create new
-                        subprocess.run(
+                        nm_result = run_tool(
                             ['nmcli', 'connection', 'add', 'type', 'wifi',
                              'con-name', ssid, 'ssid', ssid,
                              'wifi-sec.key-mgmt', 'wpa-psk',
                              'wifi-sec.psk', password],
                             capture_output=True, timeout=10
                         )
-                except:
-                    pass  # Non-critical if NM add fails
+                    if nm_result.returncode != 0:
+                        print(f"[WARN] NetworkManager did not store the password for {ssid}: "
+                              f"{nm_result.stderr.decode(errors='replace').strip()}")
+                except Exception as e:
+                    # Non-critical if NM add fails
+                    print(f"[WARN] Failed to add {ssid} to NetworkManager: {e}")
 
             self.send_json_response({'success': True, 'network': network_entry})
         except Exception as e:
@@ -1234,25 +2001,26 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_delete_network(self, post_data):
         """Delete a saved network"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             ssid = data.get('ssid', '').strip()
 
             if not ssid:
                 self.send_json_response({'error': 'SSID required'}, 400)
                 return
 
-            config = self._load_config()
-            if 'saved_networks' not in config:
-                config['saved_networks'] = []
+            with CONFIG_LOCK:
+                config = self._load_config()
+                if 'saved_networks' not in config:
+                    config['saved_networks'] = []
 
-            # Remove from saved networks
-            config['saved_networks'] = [n for n in config['saved_networks'] if n['ssid'] != ssid]
-            self._save_config(config)
+                # Remove from saved networks
+                config['saved_networks'] = [n for n in config['saved_networks'] if n['ssid'] != ssid]
+                self._save_config(config)
 
             # Optionally remove from NetworkManager too
             if data.get('remove_from_system', True):
                 try:
-                    subprocess.run(
+                    run_tool(
                         ['nmcli', 'connection', 'delete', ssid],
                         capture_output=True, timeout=10
                     )
@@ -1266,7 +2034,7 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def handle_connect_saved_network(self, post_data):
         """Connect to a saved network"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             ssid = data.get('ssid', '').strip()
 
             if not ssid:
@@ -1274,20 +2042,19 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 return
 
             # Try to connect via NetworkManager
-            result = subprocess.run(
+            result = run_tool(
                 ['nmcli', 'connection', 'up', ssid],
                 capture_output=True, text=True, timeout=30
             )
 
             if result.returncode == 0:
-                # Update last_connected
-                config = self._load_config()
-                for network in config.get('saved_networks', []):
-                    if network['ssid'] == ssid:
-                        network['last_connected'] = time.strftime('%Y-%m-%dT%H:%M:%SZ')
-                        break
-                self._save_config(config)
+                # Connection changed; don't serve the cached /api/status answer
+                STATUS_CACHE['value'] = None
                 self.send_json_response({'success': True, 'message': 'Connected'})
+                # Bookkeeping only: never delays or fails the connect response
+                threading.Thread(target=self._record_last_connected,
+                                 args=(ssid, now_iso()),
+                                 daemon=True).start()
             else:
                 self.send_json_response({
                     'success': False,
@@ -1296,104 +2063,38 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
+    def _record_last_connected(self, ssid, timestamp):
+        """Set last_connected on a saved network (debounced save)"""
+        try:
+            with CONFIG_LOCK:
+                config = self._load_config()
+                idx, network = self._find_saved_network(config, ssid)
+                if network is None:
+                    return
+                network['last_connected'] = timestamp
+                self._schedule_save(config)
+        except Exception as e:
+            print(f"[ERROR] Failed to record last_connected for {ssid}: {e}")
+
     def handle_get_nearby_networks(self):
         """Scan for nearby WiFi networks"""
         try:
-            # Trigger a rescan
-            subprocess.run(['nmcli', 'device', 'wifi', 'rescan'],
-                         capture_output=True, timeout=10)
-            time.sleep(2)  # Give it time to scan
-
-            # Only request SSID,SIGNAL,SECURITY (skip BSSID — its colons break terse parsing)
-            result = subprocess.run(
-                ['nmcli', '-t', '-f', 'SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list'],
-                capture_output=True, text=True, timeout=10
-            )
-
-            networks = []
-            seen_ssids = set()
-
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line and ':' in line:
-                        # Parse from right: SSID can contain colons, but
-                        # SIGNAL is always a number and SECURITY is a known string
-                        last_colon = line.rfind(':')
-                        second_last = line.rfind(':', 0, last_colon)
-                        if second_last > 0:
-                            ssid = line[:second_last].strip()
-                            signal_str = line[second_last+1:last_colon]
-                            security = line[last_colon+1:]
-                        else:
-                            ssid = line[:last_colon].strip()
-                            signal_str = line[last_colon+1:]
-                            security = ''
-                        if ssid and ssid not in seen_ssids:
-                            seen_ssids.add(ssid)
-                            networks.append({
-                                'ssid': ssid,
-                                'signal': int(signal_str) if signal_str.strip().isdigit() else 0,
-                                'security': security.strip(),
-                                'encrypted': security.strip() != '' and security.strip() != '--'
-                            })
-
-            # Sort by signal strength
-            networks.sort(key=lambda x: x['signal'], reverse=True)
-            self.send_json_response({'networks': networks})
+            self.send_json_response({'networks': get_cached_wifi_scan()})
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
     def handle_get_nearby_networks_compat(self):
         """Get nearby networks in WiFi Connect compatible format"""
         try:
-            # Trigger a rescan
-            subprocess.run(['nmcli', 'device', 'wifi', 'rescan'],
-                         capture_output=True, timeout=10)
-            time.sleep(2)
-
-            result = subprocess.run(
-                ['nmcli', '-t', '-f', 'SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list'],
-                capture_output=True, text=True, timeout=10
-            )
-
-            networks = []
-            seen_ssids = set()
-
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line and ':' in line:
-                        # Parse from right: SSID can contain colons, but
-                        # SIGNAL is always a number and SECURITY is a known string
-                        last_colon = line.rfind(':')
-                        second_last = line.rfind(':', 0, last_colon)
-                        if second_last > 0:
-                            ssid = line[:second_last].strip()
-                            signal_str = line[second_last+1:last_colon]
-                            security = line[last_colon+1:]
-                        else:
-                            # Fallback: only one colon
-                            ssid = line[:last_colon].strip()
-                            signal_str = line[last_colon+1:]
-                            security = ''
-                        if ssid and ssid not in seen_ssids:
-                            seen_ssids.add(ssid)
-                            networks.append({
-                                'ssid': ssid,
-                                'signal': int(signal_str) if signal_str.strip().isdigit() else 0,
-                                'security': security.strip(),
-                                'encrypted': security.strip() != '' and security.strip() != '--'
-                            })
-
-            networks.sort(key=lambda x: x['signal'], reverse=True)
             # Return as array directly (WiFi Connect format)
-            self.send_json_response(networks)
+            self.send_json_response(get_cached_wifi_scan())
         except Exception as e:
             self.send_json_response([], 200)  # Return empty array on error
 
     def handle_wifi_connect(self, post_data):
         """Connect to a WiFi network (WiFi Connect compatible)"""
         try:
-            data = json.loads(post_data)
+            data = _loads(post_data)
             ssid = data.get('ssid', '').strip()
             password = data.get('passphrase', '') or data.get('password', '')
 
@@ -1401,37 +2102,39 @@ class ConfigHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'error': 'SSID required'}, 400)
                 return
 
-            # Check if connection already exists
-            check = subprocess.run(
-                ['nmcli', 'connection', 'show', ssid],
-                capture_output=True, timeout=5
-            )
+            # Check if connection already exists, fetching its PSK in the same call
+            stored_psk = get_stored_wifi_psk(ssid)
 
-            if check.returncode == 0:
-                # Connection exists, update password if provided and connect
-                if password:
-                    subprocess.run(
+            if stored_psk is not None:
+                # Connection exists, update password if provided and connect.
+                # Skip the modify (and NM rewriting its secrets) when NM
+                # already holds this PSK. Compare against NM itself, not
+                # saved_networks: a failed attempt leaves its PSK in NM.
+                if password and stored_psk != password:
+                    run_tool(
                         ['nmcli', 'connection', 'modify', ssid, 'wifi-sec.psk', password],
                         capture_output=True, timeout=10
                     )
-                result = subprocess.run(
+                result = run_tool(
                     ['nmcli', 'connection', 'up', ssid],
                     capture_output=True, text=True, timeout=30
                 )
             else:
                 # Create new connection
                 if password:
-                    result = subprocess.run(
+                    result = run_tool(
                         ['nmcli', 'device', 'wifi', 'connect', ssid, 'password', password],
                         capture_output=True, text=True, timeout=30
                     )
                 else:
-                    result = subprocess.run(
+                    result = run_tool(
                         ['nmcli', 'device', 'wifi', 'connect', ssid],
                         capture_output=True, text=True, timeout=30
                     )
 
             if result.returncode == 0:
+                # Connection changed; don't serve the cached /api/status answer
+                STATUS_CACHE['value'] = None
                 # Also save to our networks list
                 self._save_network_to_list(ssid, password)
                 self.send_json_response({'success': True})
@@ -1446,27 +2149,28 @@ class ConfigHandler(SimpleHTTPRequestHandler):
     def _save_network_to_list(self, ssid, password):
         """Helper to save network to saved_networks list"""
         try:
-            config = self._load_config()
-            if 'saved_networks' not in config:
-                config['saved_networks'] = []
-
-            existing = next((n for n in config['saved_networks'] if n['ssid'] == ssid), None)
-            if not existing:
-                config['saved_networks'].append({
-                    'ssid': ssid,
-                    'password': password,
-                    'priority': 0,
-                    'auto_connect': True,
-                    'notes': '',
-                    'added_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'last_connected': time.strftime('%Y-%m-%dT%H:%M:%SZ')
-                })
-            else:
-                existing['last_connected'] = time.strftime('%Y-%m-%dT%H:%M:%SZ')
-                if password:
-                    existing['password'] = password
+            with CONFIG_LOCK:
+                config = self._load_config()
+                if 'saved_networks' not in config:
+                    config['saved_networks'] = []
+
+                idx, existing = self._find_saved_network(config, ssid)
+                if not existing:
+                    config['saved_networks'].append({
+                        'ssid': ssid,
+                        'password': password,
+                        'priority': 0,
+                        'auto_connect': True,
+                        'notes': '',
+                        'added_at': now_iso(),
+                        'last_connected': now_iso()
+                    })
+                else:
+                    existing['last_connected'] = now_iso()
+                    if password:
+                        existing['password'] = password
 
-            self._save_config(config)
+                self._schedule_save(config)
         except:
             pass  # Non-critical
 
@@ -1476,28 +2180,95 @@ class ConfigHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+TEST_EXIT_GRACE = 60  # Seconds an exited test's output is kept for a final poll
+TEST_MAX_RUNTIME = 3600  # Tests running longer than this are stopped by the reaper
+
+
+def stop_test_process(process):
+    """Terminate a test's process group, escalating to SIGKILL after 1s"""
+    try:
+        os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+        time.sleep(1)
+        if process.poll() is None:
+            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+    except:
+        # Fallback to just killing the process
+        process.terminate()
+        time.sleep(1)
+        if process.poll() is None:
+            process.kill()
+
+
+def release_test_output(proc_info):
+    """Close a test's output handle and remove its output file"""
+    try:
+        if 'output_handle' in proc_info:
+            proc_info['output_handle'].close()
+    except:
+        pass
+    try:
+        os.unlink(proc_info['output_file'])
+    except:
+        pass
+
+
+def cleanup_test(pid_str):
+    """Forget a test process and release its output, returns its entry if found"""
+    with TEST_PROCESSES_LOCK:
+        proc_info = TEST_PROCESSES.pop(pid_str, None)
+    if proc_info is not None:
+        release_test_output(proc_info)
+    return proc_info
+
+
+def reap_test_processes():
+    """Background janitor for tests the UI stopped polling
+
+    Exited tests get TEST_EXIT_GRACE seconds for the UI to fetch the rest of
+    their output; runaway tests are stopped after TEST_MAX_RUNTIME.
+    """
+    while True:
+        time.sleep(1)
+        now = time.time()
+        expired = []
+        overdue = []
+        with TEST_PROCESSES_LOCK:
+            for pid_str, proc_info in TEST_PROCESSES.items():
+                if proc_info['process'].poll() is not None:
+                    exit_time = proc_info.setdefault('exit_time', now)
+                    if now - exit_time > TEST_EXIT_GRACE:
+                        expired.append(pid_str)
+                elif now - proc_info['start_time'] > TEST_MAX_RUNTIME:
+                    overdue.append(pid_str)
+            # Claim overdue entries now so handlers don't race the (slow) kill below
+            overdue = [TEST_PROCESSES.pop(pid_str) for pid_str in overdue]
+
+        for pid_str in expired:
+            cleanup_test(pid_str)
+        for proc_info in overdue:
+            print(f"[TEST] Stopping test after {TEST_MAX_RUNTIME}s: {proc_info['command']}")
+            stop_test_process(proc_info['process'])
+            release_test_output(proc_info)
+
+
 def cleanup_test_processes():
     """Clean up any remaining test processes on exit"""
     global TEST_PROCESSES
-    for pid_str, proc_info in list(TEST_PROCESSES.items()):
+    # Take the entries under the lock; handler threads may still be running
+    with TEST_PROCESSES_LOCK:
+        entries = list(TEST_PROCESSES.values())
+        TEST_PROCESSES.clear()
+    for proc_info in entries:
         try:
             process = proc_info['process']
             if process.poll() is None:
                 os.killpg(os.getpgid(process.pid), signal.SIGTERM)
         except:
             pass
-        try:
-            if 'output_handle' in proc_info:
-                proc_info['output_handle'].close()
-        except:
-            pass
-        try:
-            os.unlink(proc_info['output_file'])
-        except:
-            pass
-    TEST_PROCESSES.clear()
+        release_test_output(proc_info)
 
 def run_server():
     # Check for port argument
@@ -1519,9 +2290,14 @@ def run_server():
     signal.signal(signal.SIGINT, signal_handler)
 
     server_address = ('', port)
-    httpd = HTTPServer(server_address, ConfigHandler)
+    # Threaded so a slow subprocess handler doesn't stall the UI's polling
+    httpd = ThreadingHTTPServer(server_address, ConfigHandler)
     print(f"Enhanced config server running on port {port}...")
 
+    threading.Thread(target=reap_test_processes, daemon=True).start()
+    threading.Thread(target=refresh_status, daemon=True).start()
+    load_static_cache()
+
     try:
         httpd.serve_forever()
     finally: